@@ -7,6 +7,8 @@ from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from flask_login import LoginManager
 from flask_bcrypt import Bcrypt
+from db_routing import RoutingSession, REPLICA_BIND_KEY, replica_monitor
+import sqlite_profile
 
 # Configure more detailed logging
 logging.basicConfig(
@@ -18,7 +20,7 @@ logging.basicConfig(
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
 login_manager = LoginManager()
 bcrypt = Bcrypt()
 
@@ -42,12 +44,16 @@ try:
     
     # Configure SQLAlchemy
     app.config["SQLALCHEMY_DATABASE_URI"] = database_url
-    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-        "pool_recycle": 300,  # Reconnect after 5 minutes of inactivity
-        "pool_pre_ping": True,  # Verify connections before using them
-        "pool_size": 10,  # Maximum number of connections to keep
-        "max_overflow": 20,  # Maximum number of connections to create beyond pool_size
-    }
+    if database_url.startswith("sqlite") and sqlite_profile.is_enabled():
+        # WAL, busy timeout and tuned pragmas are applied in sqlite_profile.configure
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = sqlite_profile.engine_options()
+    else:
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+            "pool_recycle": 300,  # Reconnect after 5 minutes of inactivity
+            "pool_pre_ping": True,  # Verify connections before using them
+            "pool_size": 10,  # Maximum number of connections to keep
+            "max_overflow": 20,  # Maximum number of connections to create beyond pool_size
+        }
     
     # For PostgreSQL connections, add a timeout
     if database_url.startswith("postgresql://"):
@@ -57,6 +63,15 @@ try:
         
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     
+    # Optional read replica for read-only views (see db_routing.py)
+    replica_url = os.environ.get("DATABASE_REPLICA_URL")
+    if replica_url:
+        if replica_url.startswith("postgres://"):
+            replica_url = replica_url.replace("postgres://", "postgresql://", 1)
+        app.config["SQLALCHEMY_BINDS"] = {REPLICA_BIND_KEY: replica_url}
+        replica_monitor.max_lag_seconds = float(os.environ.get("DATABASE_REPLICA_MAX_LAG_SECONDS", 5))
+        logging.info(f"Routing read-only views to replica: {replica_url.split('://')[0]}://*****@*****")
+    
     # Log database connection info (without exposing credentials)
     db_type = database_url.split("://")[0]
     logging.info(f"Connecting to database: {db_type}://*****@*****")
@@ -65,14 +80,57 @@ except Exception as e:
     # Fallback to SQLite if there's a configuration error
     database_url = "sqlite:///waste_management.db"
     app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = sqlite_profile.engine_options()
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     logging.warning(f"Using fallback SQLite database: {database_url}")
 
+# Number of cards per page in the marketplace and municipality lists
+app.config["LISTING_PAGE_SIZE"] = int(os.environ.get("LISTING_PAGE_SIZE", 24))
+
+# Seconds between full leaderboard rebuilds from the database
+app.config["LEADERBOARD_SNAPSHOT_SECONDS"] = int(os.environ.get("LEADERBOARD_SNAPSHOT_SECONDS", 300))
+
+# Seconds a logged-in user's profile fields are cached per worker
+app.config["USER_CACHE_TTL_SECONDS"] = int(os.environ.get("USER_CACHE_TTL_SECONDS", 60))
+
+# Seconds a journey integrity verdict is reused for an unchanged chain head
+app.config["INTEGRITY_CACHE_TTL_SECONDS"] = int(os.environ.get("INTEGRITY_CACHE_TTL_SECONDS", 3600))
+
+# Leading zero hex digits required of journey block hashes
+app.config["BLOCK_MINING_DIFFICULTY"] = int(os.environ.get("BLOCK_MINING_DIFFICULTY", 2))
+
+# Leading zero hex digits every unsigned block must have to verify; keep it at
+# the lowest difficulty the chain was ever mined with
+app.config["BLOCK_VERIFY_DIFFICULTY"] = int(os.environ.get("BLOCK_VERIFY_DIFFICULTY", app.config["BLOCK_MINING_DIFFICULTY"]))
+
+# Mine bulk journey stage batches across a worker process pool (single blocks are mined inline)
+app.config["BLOCK_MINING_IN_POOL"] = os.environ.get("BLOCK_MINING_IN_POOL", "0") == "1"
+
+# How new journey blocks are sealed: "mining" (proof of work) or "signature"
+# (Ed25519 signature by this deployment's verifier, see manage_verifiers.py)
+app.config["BLOCK_SEALING_MODE"] = os.environ.get("BLOCK_SEALING_MODE", "mining")
+app.config["BLOCK_SIGNING_VERIFIER"] = os.environ.get("BLOCK_SIGNING_VERIFIER")
+app.config["VERIFIER_KEY_FOLDER"] = os.environ.get("VERIFIER_KEY_FOLDER", os.path.join(app.instance_path, "verifier_keys"))
+
 # Configure upload folder
 UPLOAD_FOLDER = "static/uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 
+# Canonical public address of the site (e.g. https://wasteworks.example.org),
+# encoded in verification QR codes; server-rendered QR images need it
+app.config["PUBLIC_BASE_URL"] = os.environ.get("PUBLIC_BASE_URL")
+
+# Rendered QR code images, cached per waste item
+app.config["QR_CACHE_FOLDER"] = os.environ.get("QR_CACHE_FOLDER", os.path.join(app.instance_path, "qr_cache"))
+
+# Static snapshots of public verification pages, rewritten when a journey changes
+app.config["VERIFY_SNAPSHOT_FOLDER"] = os.environ.get("VERIFY_SNAPSHOT_FOLDER", os.path.join(app.instance_path, "verify_snapshots"))
+
+# Rendered infrastructure heatmap tiles, dropped when a report inside them changes
+app.config["HEATMAP_TILE_FOLDER"] = os.environ.get("HEATMAP_TILE_FOLDER", os.path.join(app.instance_path, "heatmap_tiles"))
+app.config["HEATMAP_TILE_TTL_SECONDS"] = int(os.environ.get("HEATMAP_TILE_TTL_SECONDS", 900))
+
 # Initialize the extensions
 db.init_app(app)
 login_manager.init_app(app)
@@ -80,11 +138,15 @@ login_manager.login_view = "auth.login"
 login_manager.login_message_category = "info"
 bcrypt.init_app(app)
 
+# Tune SQLite before the first connection is opened (no-op for PostgreSQL)
+with app.app_context():
+    sqlite_profile.configure(db, RoutingSession)
+
 # Set up the user loader for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
-    from models import User
-    return User.query.get(int(user_id))
+    from user_cache import load_cached_user
+    return load_cached_user(int(user_id))
 
 
 with app.app_context():
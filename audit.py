@@ -0,0 +1,49 @@
+"""
+Journey audit routes for WasteWorks.
+Exposes Merkle inclusion proofs so anyone can check a journey block was
+part of a published checkpoint, and the chain auditor's progress.
+"""
+
+from flask import jsonify, abort
+from flask_login import login_required
+from db_routing import read_only
+from models import ChainAuditRun, BrokenChain
+import audit_service
+
+# Most problems listed with the latest audit run
+AUDIT_PROBLEMS_SHOWN = 100
+
+def register_audit_routes(app):
+    """Register journey audit routes"""
+
+    @app.route('/api/audit/proof/<int:block_id>')
+    @read_only
+    def api_block_proof(block_id):
+        """
+        Merkle inclusion proof for a journey block (no login required)
+        """
+        proof = audit_service.get_inclusion_proof(block_id)
+        if proof is None:
+            abort(404)
+        
+        return jsonify(proof)
+    
+    @app.route('/api/audit/runs/latest')
+    @login_required
+    @read_only
+    def api_latest_chain_audit():
+        """
+        Progress and throughput of the most recent chain audit run
+        """
+        run = ChainAuditRun.query.order_by(ChainAuditRun.id.desc()).first()
+        if run is None:
+            abort(404)
+        
+        summary = audit_service.get_audit_run_summary(run)
+        # A bad run can record a great many problems, so only the first are loaded
+        problems = BrokenChain.query.filter_by(run_id=run.id).order_by(BrokenChain.id).limit(AUDIT_PROBLEMS_SHOWN)
+        summary['problems'] = [
+            {'waste_item_id': problem.waste_item_id, 'block_id': problem.block_id, 'problem': problem.problem}
+            for problem in problems
+        ]
+        return jsonify(summary)
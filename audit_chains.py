@@ -0,0 +1,70 @@
+"""
+Background chain-integrity auditor.
+Streams every waste journey block in chain order, re-hashes the chains
+across a process pool and records broken chains in the broken_chain table.
+Progress is saved after every batch; use --resume to continue an
+interrupted run.
+"""
+
+import sys
+import time
+import logging
+import argparse
+from app import app
+from audit_service import start_chain_audit, run_chain_audit, get_audit_run_summary, AUDIT_BATCH_BLOCKS
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+
+# Seconds between progress log lines
+PROGRESS_INTERVAL_SECONDS = 5
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the latest run that did not complete')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (defaults to the CPU count)')
+    parser.add_argument('--batch-blocks', type=int, default=AUDIT_BATCH_BLOCKS,
+                        help='Approximate number of blocks per worker task')
+    args = parser.parse_args()
+    
+    last_logged = [0.0]
+    
+    def log_progress(run):
+        now = time.monotonic()
+        if now - last_logged[0] < PROGRESS_INTERVAL_SECONDS:
+            return
+        last_logged[0] = now
+        logging.info(
+            f"Run {run.id}: {run.items_scanned} items, {run.blocks_scanned} blocks, "
+            f"{run.broken_chains} broken, {run.blocks_per_second:,.0f} blocks/sec "
+            f"(resume point: item {run.last_waste_item_id})"
+        )
+    
+    with app.app_context():
+        run = start_chain_audit(resume=args.resume)
+        logging.info(f"Chain audit run {run.id} starting after item {run.last_waste_item_id}")
+        
+        run = run_chain_audit(run, workers=args.workers, batch_blocks=args.batch_blocks,
+                              on_progress=log_progress)
+        summary = get_audit_run_summary(run)
+    
+    logging.info(
+        f"Run {summary['run_id']} {summary['status']}: {summary['items_scanned']} items, "
+        f"{summary['blocks_scanned']} blocks in {summary['elapsed_seconds']}s "
+        f"({summary['blocks_per_second']:,.0f} blocks/sec)"
+    )
+    
+    if summary['broken_chains']:
+        logging.error(f"{summary['broken_chains']} broken chain(s) recorded for run {summary['run_id']}.")
+        return 1
+    
+    logging.info("All journey chains verified.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,401 @@
+"""
+Journey audit service for WasteWorks.
+Builds periodic Merkle checkpoints over all waste journey block hashes so a
+city-wide audit only re-hashes the blocks added since the last checkpoint,
+and any block can be proven part of a checkpoint with a short proof.
+Also runs the background chain-integrity auditor, which re-verifies every
+journey chain across a process pool.
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from models import WasteJourneyBlock, JourneyCheckpoint, JourneyCheckpointNode, ChainAuditRun, BrokenChain
+from app import app, db
+from blockchain_service import get_verifier_public_keys
+import chain_verify
+import merkle
+import signing
+
+# Most blocks covered by one checkpoint
+CHECKPOINT_MAX_BLOCKS = 10000
+
+# Blocks per task sent to an auditor worker process
+AUDIT_BATCH_BLOCKS = 5000
+
+# Rows fetched from the database per round trip by the auditor
+AUDIT_STREAM_CHUNK = 20000
+
+# Blocks younger than this are left for the next run, so a transaction that
+# took a lower block id but committed late is not skipped over
+CHECKPOINT_SETTLE_SECONDS = 60
+
+def get_latest_checkpoint():
+    """
+    Get the most recent journey checkpoint.
+
+    Returns:
+        JourneyCheckpoint, or None if none exist yet
+    """
+    return JourneyCheckpoint.query.order_by(JourneyCheckpoint.last_block_id.desc()).first()
+
+def _load_new_blocks(after_block_id, cutoff, limit):
+    blocks = WasteJourneyBlock.query.filter(
+        WasteJourneyBlock.id > after_block_id
+    ).order_by(WasteJourneyBlock.id).limit(limit).all()
+
+    # Stop at the first block that has not settled yet
+    for i, block in enumerate(blocks):
+        if block.timestamp is not None and block.timestamp >= cutoff:
+            return blocks[:i]
+    return blocks
+
+def create_checkpoints(max_blocks=CHECKPOINT_MAX_BLOCKS, settle_seconds=CHECKPOINT_SETTLE_SECONDS):
+    """
+    Checkpoint every block added since the last checkpoint.
+    Only the new blocks are re-hashed; each run adds one checkpoint per
+    max_blocks new blocks.
+
+    Args:
+        max_blocks: Most blocks covered by one checkpoint
+        settle_seconds: Skip blocks younger than this
+
+    Returns:
+        List of newly created JourneyCheckpoint objects
+    """
+    latest = get_latest_checkpoint()
+    after_block_id = latest.last_block_id if latest else 0
+    previous_root = latest.merkle_root if latest else None
+    cutoff = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    signature_verifier = signing.SignatureVerifier(get_verifier_public_keys())
+    difficulty = app.config["BLOCK_VERIFY_DIFFICULTY"]
+
+    created = []
+    while True:
+        blocks = _load_new_blocks(after_block_id, cutoff, max_blocks)
+        if not blocks:
+            break
+
+        levels = merkle.merkle_levels([block.block_hash for block in blocks])
+        checkpoint = JourneyCheckpoint(
+            first_block_id=blocks[0].id,
+            last_block_id=blocks[-1].id,
+            block_count=len(blocks),
+            merkle_root=levels[-1][0].hex(),
+            previous_root=previous_root,
+            invalid_blocks=sum(1 for block in blocks if not block.is_valid(signature_verifier, difficulty))
+        )
+        db.session.add(checkpoint)
+        db.session.flush()
+        _store_checkpoint_tree(checkpoint, [block.id for block in blocks], levels)
+        db.session.commit()
+        created.append(checkpoint)
+
+        after_block_id = checkpoint.last_block_id
+        previous_root = checkpoint.merkle_root
+
+        # Drop the processed blocks so long runs do not accumulate them
+        for block in blocks:
+            db.session.expunge(block)
+
+        if len(blocks) < max_blocks:
+            break
+
+    return created
+
+def _store_checkpoint_tree(checkpoint, block_ids, levels):
+    """Save every node of a checkpoint's tree; only adds to the current session"""
+    db.session.execute(db.insert(JourneyCheckpointNode), [
+        {
+            'checkpoint_id': checkpoint.id,
+            'level': level_index,
+            'position': position,
+            'digest': digest.hex(),
+            'block_id': block_ids[position] if level_index == 0 else None
+        }
+        for level_index, level in enumerate(levels)
+        for position, digest in enumerate(level)
+    ])
+
+def backfill_checkpoint_trees():
+    """
+    Store the Merkle tree of checkpoints created before trees were stored.
+    Checkpoints whose blocks no longer reproduce their root are skipped, so
+    their proofs keep being rebuilt and reported as unverified.
+
+    Returns:
+        Number of checkpoints backfilled
+    """
+    stored = db.select(JourneyCheckpointNode.checkpoint_id).distinct()
+    filled = 0
+    for checkpoint in JourneyCheckpoint.query.filter(JourneyCheckpoint.id.notin_(stored)).all():
+        leaves = _get_checkpoint_leaves(checkpoint)
+        levels = merkle.merkle_levels([block_hash for _, block_hash in leaves])
+        if not levels or levels[-1][0].hex() != checkpoint.merkle_root:
+            logging.warning(f"Checkpoint {checkpoint.id} no longer matches its blocks; not storing its tree.")
+            continue
+        _store_checkpoint_tree(checkpoint, [block_id for block_id, _ in leaves], levels)
+        db.session.commit()
+        filled += 1
+    return filled
+
+def _get_checkpoint_leaves(checkpoint):
+    """Get (block id, block hash) rows covered by a checkpoint in leaf order"""
+    return db.session.execute(
+        db.select(WasteJourneyBlock.id, WasteJourneyBlock.block_hash)
+        .where(WasteJourneyBlock.id.between(checkpoint.first_block_id, checkpoint.last_block_id))
+        .order_by(WasteJourneyBlock.id)
+    ).all()
+
+def _read_proof(checkpoint, position):
+    """Read the stored sibling nodes of a checkpoint leaf as proof steps"""
+    path = merkle.sibling_path(position, checkpoint.block_count)
+    if not path:
+        return []
+
+    rows = db.session.execute(
+        db.select(JourneyCheckpointNode.level, JourneyCheckpointNode.position, JourneyCheckpointNode.digest)
+        .where(
+            JourneyCheckpointNode.checkpoint_id == checkpoint.id,
+            db.or_(*(
+                db.and_(JourneyCheckpointNode.level == level, JourneyCheckpointNode.position == sibling)
+                for level, sibling, _ in path
+            ))
+        )
+    )
+    digests = {(level, node_position): digest for level, node_position, digest in rows}
+    return [{'hash': digests[(level, sibling)], 'position': side} for level, sibling, side in path]
+
+def get_inclusion_proof(block_id):
+    """
+    Build the Merkle inclusion proof for a journey block.
+
+    Args:
+        block_id: ID of the journey block
+
+    Returns:
+        Dictionary with the checkpoint, the proof and whether it verifies,
+        or None if the block does not exist
+    """
+    block_hash = db.session.execute(
+        db.select(WasteJourneyBlock.block_hash).where(WasteJourneyBlock.id == block_id)
+    ).scalar()
+    if block_hash is None:
+        return None
+
+    leaf = db.session.execute(
+        db.select(JourneyCheckpointNode.checkpoint_id, JourneyCheckpointNode.position)
+        .where(JourneyCheckpointNode.block_id == block_id, JourneyCheckpointNode.level == 0)
+    ).first()
+    if leaf:
+        checkpoint = db.session.get(JourneyCheckpoint, leaf.checkpoint_id)
+        proof = _read_proof(checkpoint, leaf.position)
+    else:
+        checkpoint = JourneyCheckpoint.query.filter(
+            JourneyCheckpoint.first_block_id <= block_id,
+            JourneyCheckpoint.last_block_id >= block_id
+        ).first()
+        if not checkpoint:
+            return {
+                'block_id': block_id,
+                'block_hash': block_hash,
+                'checkpointed': False
+            }
+
+        # No stored tree (see backfill_checkpoint_trees), so rebuild it
+        leaves = _get_checkpoint_leaves(checkpoint)
+        block_ids = [leaf_id for leaf_id, _ in leaves]
+        hashes = [leaf_hash for _, leaf_hash in leaves]
+        proof = merkle.inclusion_proof(hashes, block_ids.index(block_id))
+
+    return {
+        'block_id': block_id,
+        'block_hash': block_hash,
+        'checkpointed': True,
+        'checkpoint_id': checkpoint.id,
+        'checkpoint_created_at': checkpoint.created_at.isoformat() if checkpoint.created_at else None,
+        'merkle_root': checkpoint.merkle_root,
+        'proof': proof,
+        'verified': merkle.verify_proof(block_hash, proof, checkpoint.merkle_root)
+    }
+
+def verify_checkpoints():
+    """
+    Re-check every checkpoint against the stored block hashes.
+    Detects blocks that were altered, removed or inserted after their
+    checkpoint was taken, and breaks in the checkpoint chain.
+
+    Returns:
+        List of problem dictionaries (empty when everything verifies)
+    """
+    problems = []
+    previous_root = None
+
+    for checkpoint in JourneyCheckpoint.query.order_by(JourneyCheckpoint.last_block_id):
+        hashes = [block_hash for _, block_hash in _get_checkpoint_leaves(checkpoint)]
+
+        if checkpoint.previous_root != previous_root:
+            problems.append({'checkpoint_id': checkpoint.id, 'problem': 'chain_broken'})
+        if len(hashes) != checkpoint.block_count:
+            problems.append({'checkpoint_id': checkpoint.id, 'problem': 'block_count_changed'})
+        elif merkle.merkle_root(hashes) != checkpoint.merkle_root:
+            problems.append({'checkpoint_id': checkpoint.id, 'problem': 'root_mismatch'})
+
+        previous_root = checkpoint.merkle_root
+
+    return problems
+
+def start_chain_audit(resume=False):
+    """
+    Start a chain audit run, or resume the latest unfinished one.
+
+    Args:
+        resume: Continue the most recent run that did not complete
+
+    Returns:
+        ChainAuditRun
+    """
+    if resume:
+        run = ChainAuditRun.query.filter(
+            ChainAuditRun.status != 'completed'
+        ).order_by(ChainAuditRun.id.desc()).first()
+        if run:
+            run.status = 'running'
+            db.session.commit()
+            return run
+
+    run = ChainAuditRun(status='running', last_waste_item_id=0)
+    db.session.add(run)
+    db.session.commit()
+    return run
+
+def iter_chain_batches(after_waste_item_id=0, batch_blocks=AUDIT_BATCH_BLOCKS, chunk_size=AUDIT_STREAM_CHUNK):
+    """
+    Stream journey blocks in chain order, grouped into batches of whole chains.
+    Reads through its own connection so progress commits do not close the cursor.
+
+    Args:
+        after_waste_item_id: Only include items with a higher id
+        batch_blocks: Approximate number of blocks per batch
+        chunk_size: Rows fetched per round trip
+
+    Yields:
+        Lists of (waste item id, rows) tuples; a chain is never split
+    """
+    table = WasteJourneyBlock.__table__
+    query = db.select(*[table.c[name] for name in chain_verify.CHAIN_ROW_COLUMNS]).where(
+        table.c.waste_item_id > after_waste_item_id
+    ).order_by(table.c.waste_item_id, table.c.timestamp, table.c.id)
+
+    batch, batch_size = [], 0
+    chain_item_id, chain_rows = None, []
+
+    with db.engine.connect() as conn:
+        result = conn.execution_options(yield_per=chunk_size).execute(query)
+        for partition in result.partitions():
+            for row in partition:
+                row = tuple(row)
+                if row[1] != chain_item_id:
+                    if chain_rows:
+                        batch.append((chain_item_id, chain_rows))
+                        batch_size += len(chain_rows)
+                        if batch_size >= batch_blocks:
+                            yield batch
+                            batch, batch_size = [], 0
+                    chain_item_id, chain_rows = row[1], []
+                chain_rows.append(row)
+
+    if chain_rows:
+        batch.append((chain_item_id, chain_rows))
+    if batch:
+        yield batch
+
+def _record_batch(run, batch, problems, elapsed_seconds):
+    """Save a finished batch's problems and advance the run's resume point"""
+    for waste_item_id, block_id, problem in problems:
+        db.session.add(BrokenChain(run_id=run.id, waste_item_id=waste_item_id,
+                                   block_id=block_id, problem=problem))
+
+    run.last_waste_item_id = batch[-1][0]
+    run.items_scanned = (run.items_scanned or 0) + len(batch)
+    run.blocks_scanned = (run.blocks_scanned or 0) + sum(len(rows) for _, rows in batch)
+    run.broken_chains = (run.broken_chains or 0) + len({waste_item_id for waste_item_id, _, _ in problems})
+    run.elapsed_seconds = elapsed_seconds
+    run.updated_at = datetime.utcnow()
+    db.session.commit()
+
+def run_chain_audit(run, workers=None, batch_blocks=AUDIT_BATCH_BLOCKS, on_progress=None):
+    """
+    Verify every journey chain after the run's resume point across a process pool.
+    Batches are recorded in order, so the resume point never skips a chain.
+
+    Args:
+        run: ChainAuditRun from start_chain_audit
+        workers: Worker processes (defaults to the CPU count)
+        batch_blocks: Approximate number of blocks per worker task
+        on_progress: Optional callback called with the run after each batch
+
+    Returns:
+        The finished ChainAuditRun
+    """
+    workers = workers or os.cpu_count() or 1
+    public_keys = get_verifier_public_keys()
+    difficulty = app.config["BLOCK_VERIFY_DIFFICULTY"]
+    started = time.perf_counter() - (run.elapsed_seconds or 0)
+    batches = iter_chain_batches(run.last_waste_item_id or 0, batch_blocks)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Keep a bounded number of batches in flight so memory stays flat
+            pending = deque()
+            for batch in batches:
+                pending.append((batch, executor.submit(chain_verify.verify_chains, batch, public_keys, difficulty)))
+                if len(pending) >= workers * 2:
+                    batch, future = pending.popleft()
+                    _record_batch(run, batch, future.result(), time.perf_counter() - started)
+                    if on_progress:
+                        on_progress(run)
+
+            while pending:
+                batch, future = pending.popleft()
+                _record_batch(run, batch, future.result(), time.perf_counter() - started)
+                if on_progress:
+                    on_progress(run)
+    except BaseException:
+        db.session.rollback()
+        run.status = 'failed'
+        db.session.commit()
+        raise
+
+    run.status = 'completed'
+    run.finished_at = datetime.utcnow()
+    run.elapsed_seconds = time.perf_counter() - started
+    db.session.commit()
+    return run
+
+def get_audit_run_summary(run):
+    """
+    Summarize a chain audit run's progress and throughput.
+
+    Args:
+        run: ChainAuditRun
+
+    Returns:
+        Dictionary of run metrics
+    """
+    return {
+        'run_id': run.id,
+        'status': run.status,
+        'started_at': run.started_at.isoformat() if run.started_at else None,
+        'updated_at': run.updated_at.isoformat() if run.updated_at else None,
+        'finished_at': run.finished_at.isoformat() if run.finished_at else None,
+        'last_waste_item_id': run.last_waste_item_id,
+        'items_scanned': run.items_scanned,
+        'blocks_scanned': run.blocks_scanned,
+        'broken_chains': run.broken_chains,
+        'elapsed_seconds': round(run.elapsed_seconds or 0, 1),
+        'blocks_per_second': round(run.blocks_per_second, 1)
+    }
@@ -104,8 +104,10 @@ def logout():
 @login_required
 def profile():
     from rewards import get_user_stats
+    from leaderboard_service import get_user_ranks
     
     # Get user stats for display
     stats = get_user_stats(current_user.id)
+    ranks = get_user_ranks(current_user.id)
     
-    return render_template('profile.html', title='Profile', stats=stats)
\ No newline at end of file
+    return render_template('profile.html', title='Profile', stats=stats, ranks=ranks)
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+Benchmark for the journey API endpoint.
+
+Builds a throwaway SQLite database with waste items and journey blocks,
+then requests /api/waste/journey/<id> through the Flask test client with
+the original view (ORM objects, a second query plus rehash for integrity,
+jsonify) and with the current one (one column-only query, cached integrity
+verdict, orjson when installed). Reports requests per second and checks
+both views return the same payload.
+
+Usage:
+    python benchmarks/journey_api_bench.py --items 200 --blocks 6 --requests 2000
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Point the app at a scratch database before it is imported
+_db_dir = tempfile.mkdtemp(prefix='journey_api_bench_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+os.environ['VERIFY_SNAPSHOT_FOLDER'] = os.path.join(_db_dir, 'snapshots')
+os.environ.setdefault('BLOCK_MINING_DIFFICULTY', '1')
+
+from flask import jsonify
+from app import app, db
+from models import User, WasteItem
+from tracking import register_tracking_routes
+import blockchain_service
+
+def _populate(items, blocks):
+    stages = list(blockchain_service.JOURNEY_STAGES)[:blocks]
+    user = User(username='bench', email='bench@example.com')
+    db.session.add(user)
+    db.session.commit()
+
+    waste_items = [
+        WasteItem(user_id=user.id, material='plastic', is_recyclable=True, image_path='bench.jpg')
+        for _ in range(items)
+    ]
+    db.session.add_all(waste_items)
+    db.session.commit()
+    item_ids = [item.id for item in waste_items]
+
+    for stage in stages:
+        blockchain_service.create_journey_blocks(
+            item_ids, stage, 'Central Recycling Depot', f"{stage} of a benchmark item", 'Bench verifier')
+    return item_ids
+
+def _run(client, path_template, item_ids, requests):
+    started = time.perf_counter()
+    for index in range(requests):
+        response = client.get(path_template.format(item_ids[index % len(item_ids)]))
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code} from {response.request.path}")
+    return requests / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=200)
+    parser.add_argument('--blocks', type=int, default=6, help='Journey blocks per item')
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    register_tracking_routes(app)
+
+    @app.route('/bench/legacy_journey/<int:item_id>')
+    def legacy_api_waste_journey(item_id):
+        # The original api_waste_journey view
+        waste_item = WasteItem.query.get_or_404(item_id)
+        journey_blocks = blockchain_service.get_waste_journey(item_id)
+        blocks_data = []
+        for block in journey_blocks:
+            blocks_data.append({
+                'id': block.id,
+                'stage': block.stage,
+                'stage_name': blockchain_service.JOURNEY_STAGES[block.stage]['name'],
+                'location': block.location,
+                'details': block.details,
+                'timestamp': block.timestamp.isoformat(),
+                'verified_by': block.verified_by,
+                'block_hash': block.block_hash[:10] + '...' + block.block_hash[-10:]
+            })
+        return jsonify({
+            'waste_item_id': waste_item.id,
+            'material': waste_item.material,
+            'is_recyclable': waste_item.is_recyclable,
+            'blocks': blocks_data,
+            'is_valid': blockchain_service.verify_journey_integrity(item_id)
+        })
+
+    with app.app_context():
+        item_ids = _populate(args.items, args.blocks)
+
+    client = app.test_client()
+    for item_id in item_ids[:20]:
+        legacy = client.get(f'/bench/legacy_journey/{item_id}').get_json()
+        fast = client.get(f'/api/waste/journey/{item_id}').get_json()
+        if legacy != fast:
+            print(f"FAILED: payloads differ for waste item {item_id}")
+            return 1
+
+    legacy_rate = _run(client, '/bench/legacy_journey/{}', item_ids, args.requests)
+    fast_rate = _run(client, '/api/waste/journey/{}', item_ids, args.requests)
+
+    print(f"{args.items} items x {args.blocks} blocks, {args.requests} requests")
+    print(f"  legacy: {legacy_rate:>8,.0f} requests/sec")
+    print(f"    fast: {fast_rate:>8,.0f} requests/sec")
+    print(f" speedup: {fast_rate / legacy_rate:.1f}x")
+    print("OK")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
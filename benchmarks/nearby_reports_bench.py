@@ -0,0 +1,117 @@
+"""
+Benchmark for nearby infrastructure report queries.
+
+Fills a throwaway SQLite database with geotagged reports spread over a
+city-sized area, then times get_reports_near_location against the original
+full scan (load every geotagged report, flat-earth distance in Python) as
+the number of reports grows. Also checks the indexed query returns exactly
+the reports a brute-force haversine scan finds.
+
+Usage:
+    python benchmarks/nearby_reports_bench.py --sizes 1000 10000 50000 --queries 50
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Point the app at a scratch database before it is imported
+_db_dir = tempfile.mkdtemp(prefix='nearby_reports_bench_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+
+from app import app, db
+from models import User, InfrastructureReport
+import geo
+import infrastructure_service
+
+# Bengaluru, roughly 40 km across
+CENTER = (12.9716, 77.5946)
+SPREAD_DEGREES = 0.2
+
+def _legacy_near(latitude, longitude, radius_km):
+    # The original get_reports_near_location
+    reports = InfrastructureReport.query.filter(
+        InfrastructureReport.latitude.isnot(None),
+        InfrastructureReport.longitude.isnot(None)
+    ).all()
+    nearby_reports = []
+    for report in reports:
+        lat_diff = abs(report.latitude - latitude)
+        lng_diff = abs(report.longitude - longitude)
+        if ((lat_diff * 111) ** 2 + (lng_diff * 111) ** 2) ** 0.5 <= radius_km:
+            nearby_reports.append(report)
+    return nearby_reports
+
+def _add_reports(user_id, count, rng):
+    db.session.add_all([
+        InfrastructureReport(
+            user_id=user_id, title='Pothole', description='Bench report', category='road',
+            severity='medium', location_description='Bench street', image_path='',
+            latitude=CENTER[0] + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES),
+            longitude=CENTER[1] + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES)
+        )
+        for _ in range(count)
+    ])
+    db.session.commit()
+    db.session.expunge_all()
+
+def _time(query, points, radius_km):
+    started = time.perf_counter()
+    found = 0
+    for latitude, longitude in points:
+        found += len(query(latitude, longitude, radius_km))
+        db.session.expunge_all()
+    return (time.perf_counter() - started) * 1000 / len(points), found / len(points)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--radius-km', type=float, default=1.0)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    points = [
+        (CENTER[0] + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES),
+         CENTER[1] + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES))
+        for _ in range(args.queries)
+    ]
+
+    with app.app_context():
+        user = User(username='bench', email='bench@example.com')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        print(f"{'reports':>8} {'legacy ms':>10} {'indexed ms':>11} {'found':>6}")
+        total = 0
+        for size in sorted(args.sizes):
+            _add_reports(user_id, size - total, rng)
+            total = size
+
+            legacy_ms, _ = _time(_legacy_near, points, args.radius_km)
+            indexed_ms, found = _time(infrastructure_service.get_reports_near_location, points, args.radius_km)
+            print(f"{size:>8} {legacy_ms:>10.2f} {indexed_ms:>11.2f} {found:>6.1f}")
+
+        all_reports = [(report.id, report.latitude, report.longitude) for report in InfrastructureReport.query]
+        for latitude, longitude in points[:10]:
+            expected = {
+                report_id for report_id, report_lat, report_lng in all_reports
+                if geo.haversine_km(latitude, longitude, report_lat, report_lng) <= args.radius_km
+            }
+            found = {report.id for report in infrastructure_service.get_reports_near_location(
+                latitude, longitude, args.radius_km)}
+            if found != expected:
+                print(f"FAILED: indexed query disagrees with a full haversine scan at {latitude}, {longitude}")
+                return 1
+
+    print("OK")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
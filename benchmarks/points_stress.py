@@ -0,0 +1,97 @@
+"""
+Concurrent stress test for eco_points awards.
+
+Several worker processes (like gunicorn workers) award points to the same
+user at once. Each worker counts the awards it committed; afterwards both
+the balance and the Reward ledger must add up to exactly those awards, and
+the two must match each other.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/points_stress.py --workers 4 --awards 200
+"""
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+POINTS_PER_AWARD = 3
+
+def _worker(user_id, awards, results):
+    from app import app, db
+    from rewards import award_points
+    
+    completed = failures = 0
+    with app.app_context():
+        for _ in range(awards):
+            try:
+                award_points(user_id, POINTS_PER_AWARD, "Stress test award", "stress_test")
+                db.session.commit()
+                completed += 1
+            except Exception:
+                db.session.rollback()
+                failures += 1
+    results.put((completed, failures))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--awards', type=int, default=100, help='Awards per worker')
+    args = parser.parse_args()
+    
+    from app import app, db
+    from models import User, Reward
+    from rewards import reconcile_eco_points
+    
+    with app.app_context():
+        user = User(username=f"stress_{int(time.time() * 1000)}", email=f"stress_{int(time.time() * 1000)}@example.com")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    workers = [
+        context.Process(target=_worker, args=(user_id, args.awards, results))
+        for _ in range(args.workers)
+    ]
+    
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    outcomes = [results.get() for _ in workers]
+    completed = sum(done for done, _ in outcomes)
+    failures = sum(failed for _, failed in outcomes)
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    
+    with app.app_context():
+        balance = db.session.get(User, user_id).eco_points
+        ledger_points = db.session.query(db.func.sum(Reward.points)).filter_by(user_id=user_id).scalar() or 0
+        mismatches = [m for m in reconcile_eco_points() if m['user_id'] == user_id]
+        
+        # Remove the stress test data
+        Reward.query.filter_by(user_id=user_id).delete()
+        User.query.filter_by(id=user_id).delete()
+        db.session.commit()
+    
+    # Expected from what the workers actually committed, not from the ledger,
+    # so a lost or duplicated ledger row is caught as well
+    expected = completed * POINTS_PER_AWARD
+    print(f"workers={args.workers} awards={completed} failed={failures} "
+          f"elapsed={elapsed:.2f}s awards/sec={completed / elapsed:.1f}")
+    print(f"balance={balance} ledger={ledger_points} expected={expected} ledger_mismatches={len(mismatches)}")
+    
+    if balance != expected or ledger_points != expected or mismatches:
+        print("FAILED: lost or duplicated point updates")
+        return 1
+    
+    print("OK")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+SQLite write throughput with several concurrent workers.
+
+Runs the same workload twice against a fresh SQLite file: once with
+SQLite's defaults (SQLITE_PROFILE=0) and once with the tuned profile from
+sqlite_profile.py. Each worker process plays a gunicorn worker awarding
+points in its own transactions.
+
+Usage:
+    python benchmarks/sqlite_write_bench.py --workers 4 --writes 200
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def _worker(user_id, writes, ready, go, results):
+    sys.path.insert(0, ROOT)
+    from app import app, db
+    from rewards import award_points
+    
+    # Start all workers together once their imports are done
+    ready.put(True)
+    go.wait()
+    
+    completed = failures = 0
+    with app.app_context():
+        for _ in range(writes):
+            try:
+                award_points(user_id, 1, "Benchmark award", "benchmark")
+                db.session.commit()
+                completed += 1
+            except Exception:
+                db.session.rollback()
+                failures += 1
+    results.put((completed, failures))
+
+def _setup(database_path):
+    from app import app, db
+    from models import User
+    
+    with app.app_context():
+        db.create_all()
+        user = User(username="bench", email="bench@example.com")
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def run(profile, workers, writes):
+    """Run the workload in fresh worker processes and return the results"""
+    directory = tempfile.mkdtemp(prefix="wasteworks-bench-")
+    database_path = os.path.join(directory, "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ["SQLITE_PROFILE"] = "1" if profile else "0"
+    
+    context = multiprocessing.get_context('spawn')
+    setup = context.Pool(1)
+    user_id = setup.apply(_setup, (database_path,))
+    setup.close()
+    setup.join()
+    
+    ready = context.Queue()
+    go = context.Event()
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(user_id, writes, ready, go, results))
+        for _ in range(workers)
+    ]
+    
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.get()
+    
+    started = time.perf_counter()
+    go.set()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+    
+    completed = sum(outcome[0] for outcome in outcomes)
+    failures = sum(outcome[1] for outcome in outcomes)
+    return completed, failures, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--writes', type=int, default=200, help='Write transactions per worker')
+    args = parser.parse_args()
+    
+    print(f"{'profile':<10} {'workers':>7} {'committed':>10} {'failed':>7} {'seconds':>8} {'writes/sec':>11}")
+    for profile in (False, True):
+        completed, failures, elapsed = run(profile, args.workers, args.writes)
+        print(f"{'tuned' if profile else 'default':<10} {args.workers:>7} {completed:>10} "
+              f"{failures:>7} {elapsed:>8.2f} {completed / elapsed:>11.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Canonical binary encoding of waste journey blocks.
+
+Layout (version 1):
+    b'WJB' + version byte
+    waste_item_id   8-byte signed big-endian
+    timestamp       8-byte signed big-endian microseconds since the Unix epoch
+                    (naive UTC), NULL_TIMESTAMP for None
+    stage           length-prefixed UTF-8
+    location        length-prefixed UTF-8
+    details         length-prefixed UTF-8
+    verified_by     length-prefixed UTF-8
+    previous_hash   length-prefixed UTF-8
+    nonce           8-byte unsigned big-endian (always last)
+
+Lengths are 4-byte unsigned big-endian; NULL_LENGTH marks a None text value.
+The block hash is the SHA-256 of these bytes. Keeping the nonce last lets
+the miner hash everything before it once.
+
+This module has no app imports so it can run in worker processes.
+"""
+
+import hashlib
+import struct
+from datetime import datetime, timedelta
+
+ENCODING_VERSION = 1
+MAGIC = b'WJB'
+HEADER = MAGIC + bytes([ENCODING_VERSION])
+
+NULL_LENGTH = 0xFFFFFFFF
+NULL_TIMESTAMP = -2 ** 63
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+_int64 = struct.Struct('>q')
+_uint64 = struct.Struct('>Q')
+_length = struct.Struct('>I')
+_null_text = _length.pack(NULL_LENGTH)
+
+def timestamp_to_micros(timestamp):
+    """Convert a naive UTC block timestamp to integer microseconds since the epoch"""
+    if timestamp is None:
+        return NULL_TIMESTAMP
+    return (timestamp - EPOCH) // ONE_MICROSECOND
+
+def _encode_text(value):
+    if value is None:
+        return _null_text
+    data = value.encode('utf-8')
+    return _length.pack(len(data)) + data
+
+def encode_block_prefix(waste_item_id, timestamp, stage, location, details, verified_by, previous_hash):
+    """
+    Encode every block field except the nonce.
+
+    Returns:
+        Bytes to which the encoded nonce is appended
+    """
+    return b''.join((
+        HEADER,
+        _int64.pack(waste_item_id),
+        _int64.pack(timestamp_to_micros(timestamp)),
+        _encode_text(stage),
+        _encode_text(location),
+        _encode_text(details),
+        _encode_text(verified_by),
+        _encode_text(previous_hash)
+    ))
+
+def encode_nonce(nonce):
+    """Encode a nonce as the final 8 bytes of a block"""
+    return _uint64.pack(nonce)
+
+def encode_block(waste_item_id, timestamp, stage, location, details, verified_by, previous_hash, nonce):
+    """
+    Encode a block's fields canonically.
+
+    Returns:
+        Encoded bytes
+    """
+    prefix = encode_block_prefix(waste_item_id, timestamp, stage, location, details, verified_by, previous_hash)
+    return prefix + _uint64.pack(nonce)
+
+def hash_encoded(data):
+    """Hex SHA-256 of encoded block bytes"""
+    return hashlib.sha256(data).hexdigest()
@@ -3,9 +3,15 @@ Blockchain-like waste tracking system service for WasteWorks.
 This module manages the creation and validation of waste journey blocks.
 """
 
-from models import WasteJourneyBlock, WasteItem
-from app import db
+from models import WasteJourneyBlock, WasteItem, Verifier
+from app import app, db
 from datetime import datetime
+from functools import cached_property
+import os
+import threading
+import time
+import mining
+import signing
 
 # Define the journey stages and their descriptions
 JOURNEY_STAGES = {
@@ -41,6 +47,15 @@ JOURNEY_STAGES = {
     }
 }
 
+# Integrity verdicts are cached per waste item and chain head; appending a
+# block moves the head, so only in-place tampering can outlive an entry, and
+# the TTL bounds that (the background chain auditor catches it regardless)
+INTEGRITY_CACHE_TTL_SECONDS = app.config.get("INTEGRITY_CACHE_TTL_SECONDS", 3600)
+INTEGRITY_CACHE_MAX_ENTRIES = 50000
+
+_integrity_cache = {}
+_integrity_cache_lock = threading.Lock()
+
 def get_journey_stages():
     """
     Return the defined journey stages with metadata.
@@ -64,12 +79,10 @@ def create_journey_block(waste_item_id, stage, location, details, verified_by):
     Returns:
         Newly created WasteJourneyBlock
     """
-    # Get the previous block for this waste item, if any
-    previous_block = WasteJourneyBlock.query.filter_by(
-        waste_item_id=waste_item_id
-    ).order_by(WasteJourneyBlock.timestamp.desc()).first()
-    
-    previous_hash = previous_block.block_hash if previous_block else None
+    # Lock the item row so concurrent appends to this journey are serialized,
+    # and take the previous hash from its stored chain head
+    waste_item = WasteItem.query.filter_by(id=waste_item_id).with_for_update().first()
+    previous_hash = waste_item.head_block_hash if waste_item else None
     
     # Create the new block
     new_block = WasteJourneyBlock(
@@ -81,23 +94,203 @@ def create_journey_block(waste_item_id, stage, location, details, verified_by):
         previous_hash=previous_hash
     )
     
-    # Mine the block (simulate proof of work)
-    new_block.mine_block(difficulty=2)
+    if is_signature_sealing():
+        # Sign the block with this deployment's verifier key
+        new_block.seal(*get_local_signer())
+    else:
+        # Mine the block (simulate proof of work); one block is mined inline,
+        # since handing it to the pool would only add a round trip
+        new_block.mine_block(app.config["BLOCK_MINING_DIFFICULTY"])
     
-    # Save to database
     db.session.add(new_block)
+    if waste_item:
+        _advance_chain_head(waste_item, new_block)
+    
+    # Save the block and the item's chain head together
     db.session.commit()
     
-    # Update the waste item status if this is the final stage
-    if stage == 'completed':
-        waste_item = WasteItem.query.get(waste_item_id)
-        if waste_item:
-            waste_item.recycling_completed = True
-            waste_item.recycling_completion_date = datetime.utcnow()
-            db.session.commit()
+    # Republish the public verification page for QR scans
+    import snapshot_service
+    snapshot_service.refresh_verification_snapshot(waste_item_id)
     
     return new_block
 
+def is_signature_sealing():
+    """Return True if new blocks are sealed by signature instead of mined"""
+    return app.config["BLOCK_SEALING_MODE"] == "signature"
+
+def get_verifier_key_path(verifier_name):
+    """
+    Get the path of a verifier's local private key file.
+    
+    Args:
+        verifier_name: Name of the Verifier
+        
+    Returns:
+        File path
+    """
+    return os.path.join(app.config["VERIFIER_KEY_FOLDER"], f"{verifier_name}.key")
+
+_local_signer = None
+_local_signer_lock = threading.Lock()
+
+def get_local_signer():
+    """
+    Get the signing verifier of this deployment, loaded once per process.
+    
+    Returns:
+        Tuple of (verifier ID, loaded Ed25519 private key)
+        
+    Raises:
+        RuntimeError: If signature sealing is not configured
+    """
+    global _local_signer
+    with _local_signer_lock:
+        if _local_signer is None:
+            verifier_name = app.config["BLOCK_SIGNING_VERIFIER"]
+            if not verifier_name:
+                raise RuntimeError("BLOCK_SIGNING_VERIFIER must be set for signature sealing")
+            
+            verifier = Verifier.query.filter_by(name=verifier_name, is_active=True).first()
+            if verifier is None:
+                raise RuntimeError(f"Unknown or inactive verifier: {verifier_name}")
+            
+            with open(get_verifier_key_path(verifier_name), 'rb') as key_file:
+                private_key = signing.load_private_key(key_file.read())
+            _local_signer = (verifier.id, private_key)
+        return _local_signer
+
+def get_verifier_public_keys(verifier_ids=None):
+    """
+    Get registered verifier public keys in one query.
+    
+    Args:
+        verifier_ids: Only these verifiers (all if omitted)
+        
+    Returns:
+        Dictionary mapping verifier ID to raw public key bytes
+    """
+    query = db.select(Verifier.id, Verifier.public_key)
+    if verifier_ids is not None:
+        if not verifier_ids:
+            return {}
+        query = query.where(Verifier.id.in_(verifier_ids))
+    return {verifier_id: bytes(public_key) for verifier_id, public_key in db.session.execute(query)}
+
+def _advance_chain_head(waste_item, block, completion_date=None):
+    """Point a waste item's stored chain head at a newly appended block"""
+    waste_item.head_block_hash = block.block_hash
+    waste_item.current_stage = block.stage
+    waste_item.blocks_count = (waste_item.blocks_count or 0) + 1
+    
+    # Update the waste item status if this is the final stage
+    if block.stage == 'completed':
+        waste_item.recycling_completed = True
+        waste_item.recycling_completion_date = completion_date or datetime.utcnow()
+
+def get_chain_heads(waste_item_ids):
+    """
+    Get the latest block of several waste items in one query.
+    
+    Args:
+        waste_item_ids: IDs of the waste items
+        
+    Returns:
+        Dictionary mapping waste item ID to its latest WasteJourneyBlock
+    """
+    if not waste_item_ids:
+        return {}
+    
+    position = db.func.row_number().over(
+        partition_by=WasteJourneyBlock.waste_item_id,
+        order_by=(WasteJourneyBlock.timestamp.desc(), WasteJourneyBlock.id.desc())
+    ).label('position')
+    ranked = db.select(WasteJourneyBlock.id, position).where(
+        WasteJourneyBlock.waste_item_id.in_(waste_item_ids)
+    ).subquery()
+    
+    heads = WasteJourneyBlock.query.join(ranked, ranked.c.id == WasteJourneyBlock.id).filter(
+        ranked.c.position == 1
+    ).all()
+    return {block.waste_item_id: block for block in heads}
+
+def create_journey_blocks(waste_item_ids, stage, location, details, verified_by):
+    """
+    Append the same stage to the journeys of many waste items at once,
+    e.g. for every item picked up on a collection run.
+    The items and their chain heads are locked and fetched in one query,
+    blocks are mined (in parallel with BLOCK_MINING_IN_POOL) and everything
+    is saved in one transaction.
+    
+    Args:
+        waste_item_ids: IDs of the waste items
+        stage: Journey stage reached by all items
+        location: Location where this stage occurred
+        details: Additional details about this stage
+        verified_by: Name or ID of entity verifying this stage
+        
+    Returns:
+        Dictionary mapping each advanced waste item ID to its new block ID
+        (unknown item IDs are skipped)
+    """
+    waste_item_ids = list(dict.fromkeys(waste_item_ids))
+    if not waste_item_ids:
+        return {}
+    
+    # Lock in id order so overlapping bulk requests cannot deadlock
+    waste_items = WasteItem.query.filter(
+        WasteItem.id.in_(waste_item_ids)
+    ).order_by(WasteItem.id).with_for_update().all()
+    items_by_id = {item.id: item for item in waste_items}
+    
+    new_blocks = []
+    for waste_item_id in waste_item_ids:
+        waste_item = items_by_id.get(waste_item_id)
+        if waste_item is None:
+            continue
+        new_blocks.append(WasteJourneyBlock(
+            waste_item_id=waste_item_id,
+            stage=stage,
+            location=location,
+            details=details,
+            verified_by=verified_by,
+            previous_hash=waste_item.head_block_hash
+        ))
+    
+    if is_signature_sealing():
+        # Signing is cheap, so seal in this process
+        verifier_id, private_key = get_local_signer()
+        for block in new_blocks:
+            block.seal(verifier_id, private_key)
+    else:
+        # Mine all blocks, across the process pool if it is enabled
+        results = mining.mine_many(
+            [block.encode_prefix() for block in new_blocks],
+            app.config["BLOCK_MINING_DIFFICULTY"],
+            parallel=app.config["BLOCK_MINING_IN_POOL"]
+        )
+        for block, (nonce, block_hash) in zip(new_blocks, results):
+            block.set_mining_result(nonce, block_hash)
+    
+    db.session.add_all(new_blocks)
+    
+    completion_date = datetime.utcnow()
+    for block in new_blocks:
+        _advance_chain_head(items_by_id[block.waste_item_id], block, completion_date)
+    
+    # Save all blocks and chain heads together
+    db.session.flush()
+    block_ids = {block.waste_item_id: block.id for block in new_blocks}
+    db.session.commit()
+    
+    # Drop the stale verification snapshots; rendering a whole collection run of
+    # pages here would stall the request, so the next scan of each item re-renders it
+    import snapshot_service
+    for waste_item_id in block_ids:
+        snapshot_service.remove_verification_snapshot(waste_item_id)
+    
+    return block_ids
+
 def get_waste_journey(waste_item_id):
     """
     Get the complete journey of a waste item.
@@ -110,10 +303,221 @@ def get_waste_journey(waste_item_id):
     """
     blocks = WasteJourneyBlock.query.filter_by(
         waste_item_id=waste_item_id
-    ).order_by(WasteJourneyBlock.timestamp).all()
+    ).order_by(WasteJourneyBlock.timestamp, WasteJourneyBlock.id).all()
     
     return blocks
 
+def get_progress_pct(stages_completed):
+    """
+    Calculate the progress percentage of a journey.
+    
+    Args:
+        stages_completed: Number of blocks in the journey
+        
+    Returns:
+        Integer percentage
+    """
+    total_stages = len(JOURNEY_STAGES)
+    return int((stages_completed / total_stages) * 100) if total_stages > 0 else 0
+
+def _build_qr_data(waste_item, current_stage):
+    return {
+        'waste_item_id': waste_item.id,
+        'material': waste_item.material,
+        'is_recyclable': waste_item.is_recyclable,
+        'drop_date': waste_item.drop_date.isoformat() if waste_item.drop_date else None,
+        'current_stage': current_stage or 'not_started',
+        'verification_url': f"/waste/verify/{waste_item.id}"
+    }
+
+class JourneyView:
+    """
+    Snapshot of a waste item and its journey blocks, loaded once.
+    Progress, integrity, QR data and the API payload are all derived from
+    the same list of blocks, so a tracking page needs a single block query.
+    """
+    
+    def __init__(self, waste_item, blocks=None):
+        """
+        Args:
+            waste_item: WasteItem being tracked (None if only block data is needed)
+            blocks: Journey blocks in chronological order (loaded if omitted)
+        """
+        self.waste_item = waste_item
+        self.blocks = blocks if blocks is not None else get_waste_journey(waste_item.id)
+    
+    @property
+    def latest_block(self):
+        return self.blocks[-1] if self.blocks else None
+    
+    @cached_property
+    def is_valid(self):
+        """True if all blocks are valid, linked correctly and correctly signed"""
+        is_valid = self._check_integrity()
+        if self.waste_item is not None:
+            _store_integrity(self.waste_item.id, self.waste_item.head_block_hash, is_valid)
+        return is_valid
+    
+    def _check_integrity(self):
+        # Load the keys of every verifier that signed a block in one query
+        signer_ids = {block.verifier_id for block in self.blocks if block.verifier_id is not None}
+        verifier = signing.SignatureVerifier(get_verifier_public_keys(signer_ids))
+        difficulty = app.config["BLOCK_VERIFY_DIFFICULTY"]
+        
+        previous_block = None
+        for block in self.blocks:
+            # Verify the block's hash and that it was signed or mined
+            if not block.is_valid(verifier, difficulty):
+                return False
+            
+            # Check link to previous block
+            if previous_block is not None and block.previous_hash != previous_block.block_hash:
+                return False
+            previous_block = block
+        
+        return True
+    
+    @cached_property
+    def progress(self):
+        """Dictionary with progress details"""
+        latest_block = self.latest_block
+        
+        return {
+            'current_stage': latest_block.stage if latest_block else None,
+            'stages_completed': len(self.blocks),
+            'total_stages': len(JOURNEY_STAGES),
+            'progress_pct': get_progress_pct(len(self.blocks)),
+            'blocks': self.blocks
+        }
+    
+    @cached_property
+    def qr_data(self):
+        """Dictionary with waste tracking data for the QR code"""
+        latest_block = self.latest_block
+        return _build_qr_data(self.waste_item, latest_block.stage if latest_block else None)
+    
+    def to_api_dict(self):
+        """
+        Format the journey for the journey API.
+        
+        Returns:
+            Dictionary with the item, its blocks and the integrity result
+        """
+        blocks_data = [
+            _block_api_dict(block.id, block.stage, block.location, block.details,
+                            block.timestamp, block.verified_by, block.block_hash)
+            for block in self.blocks
+        ]
+        
+        return {
+            'waste_item_id': self.waste_item.id,
+            'material': self.waste_item.material,
+            'is_recyclable': self.waste_item.is_recyclable,
+            'blocks': blocks_data,
+            'is_valid': self.is_valid
+        }
+
+def _block_api_dict(block_id, stage, location, details, timestamp, verified_by, block_hash):
+    return {
+        'id': block_id,
+        'stage': stage,
+        'stage_name': JOURNEY_STAGES[stage]['name'] if stage in JOURNEY_STAGES else stage,
+        'location': location,
+        'details': details,
+        'timestamp': timestamp.isoformat(),
+        'verified_by': verified_by,
+        'block_hash': block_hash[:10] + '...' + block_hash[-10:]  # Truncated for display
+    }
+
+def get_cached_integrity(waste_item_id, head_block_hash):
+    """
+    Get a cached integrity verdict for a waste item's journey.
+    
+    Args:
+        waste_item_id: ID of the waste item
+        head_block_hash: The item's current chain head
+        
+    Returns:
+        True or False, or None if no verdict is cached for this chain head
+    """
+    with _integrity_cache_lock:
+        entry = _integrity_cache.get((waste_item_id, head_block_hash))
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+def _store_integrity(waste_item_id, head_block_hash, is_valid):
+    now = time.monotonic()
+    with _integrity_cache_lock:
+        if len(_integrity_cache) >= INTEGRITY_CACHE_MAX_ENTRIES:
+            _integrity_cache.clear()
+        _integrity_cache[(waste_item_id, head_block_hash)] = (now + INTEGRITY_CACHE_TTL_SECONDS, is_valid)
+
+def get_journey_api_data(waste_item_id):
+    """
+    Build the journey API payload without loading ORM objects.
+    Selects the item and its display columns in one query and reuses the
+    cached integrity verdict for the item's chain head; only a cache miss
+    loads the full blocks to verify them.
+    
+    Args:
+        waste_item_id: ID of the waste item
+        
+    Returns:
+        Same dictionary as JourneyView.to_api_dict, or None if the item does not exist
+    """
+    rows = db.session.execute(
+        db.select(
+            WasteItem.material,
+            WasteItem.is_recyclable,
+            WasteItem.head_block_hash,
+            WasteJourneyBlock.id,
+            WasteJourneyBlock.stage,
+            WasteJourneyBlock.location,
+            WasteJourneyBlock.details,
+            WasteJourneyBlock.timestamp,
+            WasteJourneyBlock.verified_by,
+            WasteJourneyBlock.block_hash
+        )
+        .select_from(WasteItem)
+        .outerjoin(WasteJourneyBlock, WasteJourneyBlock.waste_item_id == WasteItem.id)
+        .where(WasteItem.id == waste_item_id)
+        .order_by(WasteJourneyBlock.timestamp, WasteJourneyBlock.id)
+    ).all()
+    if not rows:
+        return None
+    
+    material, is_recyclable, head_block_hash = rows[0][:3]
+    blocks_data = [_block_api_dict(*row[3:]) for row in rows if row[3] is not None]
+    
+    is_valid = get_cached_integrity(waste_item_id, head_block_hash)
+    if is_valid is None:
+        is_valid = verify_journey_integrity(waste_item_id)
+        _store_integrity(waste_item_id, head_block_hash, is_valid)
+    
+    return {
+        'waste_item_id': waste_item_id,
+        'material': material,
+        'is_recyclable': is_recyclable,
+        'blocks': blocks_data,
+        'is_valid': is_valid
+    }
+
+def get_journey_view(waste_item_id):
+    """
+    Load a waste item and its journey in two queries.
+    
+    Args:
+        waste_item_id: ID of the waste item
+        
+    Returns:
+        JourneyView, or None if the item does not exist
+    """
+    waste_item = db.session.get(WasteItem, waste_item_id)
+    if not waste_item:
+        return None
+    return JourneyView(waste_item)
+
 def verify_journey_integrity(waste_item_id):
     """
     Verify the integrity of the waste journey blockchain.
@@ -129,21 +533,7 @@ def verify_journey_integrity(waste_item_id):
     if not blocks:
         return True  # No blocks yet, so integrity is intact
     
-    # Check each block
-    for i in range(len(blocks)):
-        current_block = blocks[i]
-        
-        # Verify the block's hash
-        if not current_block.is_valid():
-            return False
-        
-        # Check link to previous block
-        if i > 0:
-            previous_block = blocks[i-1]
-            if current_block.previous_hash != previous_block.block_hash:
-                return False
-    
-    return True
+    return JourneyView(None, blocks).is_valid
 
 def generate_qr_code_data(waste_item_id):
     """
@@ -155,27 +545,13 @@ def generate_qr_code_data(waste_item_id):
     Returns:
         Dictionary with waste tracking data
     """
-    waste_item = WasteItem.query.get(waste_item_id)
+    waste_item = db.session.get(WasteItem, waste_item_id)
     
     if not waste_item:
         return None
     
-    # Get the latest block
-    latest_block = WasteJourneyBlock.query.filter_by(
-        waste_item_id=waste_item_id
-    ).order_by(WasteJourneyBlock.timestamp.desc()).first()
-    
-    # Prepare data for QR code
-    qr_data = {
-        'waste_item_id': waste_item_id,
-        'material': waste_item.material,
-        'is_recyclable': waste_item.is_recyclable,
-        'drop_date': waste_item.drop_date.isoformat() if waste_item.drop_date else None,
-        'current_stage': latest_block.stage if latest_block else 'not_started',
-        'verification_url': f"/waste/verify/{waste_item_id}"
-    }
-    
-    return qr_data
+    # The current stage comes from the item's stored chain head
+    return _build_qr_data(waste_item, waste_item.current_stage)
 
 def get_journey_progress(waste_item_id):
     """
@@ -187,20 +563,64 @@ def get_journey_progress(waste_item_id):
     Returns:
         Dictionary with progress details
     """
-    blocks = get_waste_journey(waste_item_id)
-    stages_completed = len(blocks)
-    total_stages = len(JOURNEY_STAGES)
+    return JourneyView(None, get_waste_journey(waste_item_id)).progress
+
+def check_chain_heads(fix=False, batch_size=500):
+    """
+    Compare every waste item's stored chain head with its journey blocks.
     
-    # Get the current stage
-    current_stage = blocks[-1].stage if blocks else None
+    Args:
+        fix: If True, overwrite mismatched fields with values from the chain
+        batch_size: Items checked per round of queries
+        
+    Returns:
+        List of mismatch dictionaries, one per inconsistent item
+    """
+    mismatches = []
+    last_id = 0
     
-    # Calculate progress percentage
-    progress_pct = int((stages_completed / total_stages) * 100) if total_stages > 0 else 0
+    while True:
+        waste_items = WasteItem.query.filter(
+            WasteItem.id > last_id
+        ).order_by(WasteItem.id).limit(batch_size).all()
+        if not waste_items:
+            break
+        last_id = waste_items[-1].id
+        
+        item_ids = [item.id for item in waste_items]
+        heads = get_chain_heads(item_ids)
+        counts = dict(db.session.execute(
+            db.select(WasteJourneyBlock.waste_item_id, db.func.count(WasteJourneyBlock.id))
+            .where(WasteJourneyBlock.waste_item_id.in_(item_ids))
+            .group_by(WasteJourneyBlock.waste_item_id)
+        ).all())
+        
+        for waste_item in waste_items:
+            head = heads.get(waste_item.id)
+            expected = {
+                'head_block_hash': head.block_hash if head else None,
+                'current_stage': head.stage if head else None,
+                'blocks_count': counts.get(waste_item.id, 0)
+            }
+            stored = {
+                'head_block_hash': waste_item.head_block_hash,
+                'current_stage': waste_item.current_stage,
+                'blocks_count': waste_item.blocks_count or 0
+            }
+            if stored == expected:
+                continue
+            
+            mismatches.append({
+                'waste_item_id': waste_item.id,
+                'stored': stored,
+                'expected': expected
+            })
+            if fix:
+                for field, value in expected.items():
+                    setattr(waste_item, field, value)
+        
+        if fix:
+            db.session.commit()
+        db.session.expunge_all()
     
-    return {
-        'current_stage': current_stage,
-        'stages_completed': stages_completed,
-        'total_stages': total_stages,
-        'progress_pct': progress_pct,
-        'blocks': blocks
-    }
\ No newline at end of file
+    return mismatches
@@ -0,0 +1,128 @@
+"""
+Journey block and chain verification on plain values.
+
+Used by WasteJourneyBlock.is_valid and by the background chain auditor,
+which streams blocks out of the database and verifies them in worker
+processes. Auditor rows are tuples in CHAIN_ROW_COLUMNS order, so no ORM
+objects cross the process boundary.
+
+This module has no app imports so it can run in worker processes.
+"""
+
+import block_codec
+import signing
+from mining import hash_block_data
+
+# Block columns selected by the auditor, in row order
+CHAIN_ROW_COLUMNS = ('id', 'waste_item_id', 'timestamp', 'stage', 'location', 'details',
+                     'verified_by', 'previous_hash', 'nonce', 'block_hash',
+                     'hash_version', 'encoded_data', 'verifier_id', 'signature')
+
+# Fields covered by the block hash
+BLOCK_FIELDS = ('waste_item_id', 'timestamp', 'stage', 'location', 'details',
+                'verified_by', 'previous_hash', 'nonce')
+
+def verify_block(fields, block_hash, hash_version=None, encoded_data=None):
+    """
+    Check a block's hash against its fields.
+
+    Args:
+        fields: Dictionary with the BLOCK_FIELDS values
+        block_hash: Stored hex block hash
+        hash_version: Stored encoding version (None for legacy JSON-hashed blocks)
+        encoded_data: Stored bytes the hash was computed over
+
+    Returns:
+        True if the block is intact
+    """
+    if hash_version == block_codec.ENCODING_VERSION:
+        if encoded_data is None or bytes(encoded_data) != block_codec.encode_block(**fields):
+            return False
+        return block_codec.hash_encoded(encoded_data) == block_hash
+
+    if hash_version is not None:
+        return False  # Written by a newer encoding this code does not know
+
+    legacy_data = dict(fields, timestamp=str(fields['timestamp']))
+    if hash_block_data(legacy_data) == block_hash:
+        return True
+
+    # Legacy blocks were hashed before the database filled in their
+    # timestamp, so their hash covers the string 'None' instead
+    return hash_block_data(dict(legacy_data, timestamp='None')) == block_hash
+
+def verify_seal(block_hash, verifier_id, encoded_data, signature, difficulty, signature_verifier=None):
+    """
+    Check that a block was sealed: signed by a known verifier, or mined.
+    A block carrying any signing data must verify as signed; every other
+    block must meet the proof-of-work difficulty. Without this, a tampered
+    block could be rehashed, stripped of its signature and still pass.
+
+    Args:
+        block_hash: Stored hex block hash
+        verifier_id: Stored signing verifier ID (None for mined blocks)
+        encoded_data: Stored bytes the hash was computed over
+        signature: Stored signature (None for mined blocks)
+        difficulty: Leading '0' hex digits a mined block hash must have
+        signature_verifier: SignatureVerifier with the registered public keys
+
+    Returns:
+        None if the block is sealed, otherwise 'bad_signature' or 'insufficient_work'
+    """
+    if signature is not None or verifier_id is not None:
+        if signature_verifier is None or not signature_verifier.verify(verifier_id, encoded_data, signature):
+            return 'bad_signature'
+        return None
+
+    if not block_hash or not block_hash.startswith('0' * difficulty):
+        return 'insufficient_work'
+    return None
+
+def verify_chain(rows, signature_verifier=None, difficulty=0):
+    """
+    Verify one waste item's journey blocks.
+
+    Args:
+        rows: Block rows of one item in chain order
+        signature_verifier: SignatureVerifier for signature-sealed blocks
+        difficulty: Leading '0' hex digits required of mined blocks
+
+    Returns:
+        List of (block id, problem) tuples, where problem is 'hash_mismatch',
+        'broken_link', 'bad_signature' or 'insufficient_work'
+    """
+    problems = []
+    previous_hash = None
+    for position, row in enumerate(rows):
+        block = dict(zip(CHAIN_ROW_COLUMNS, row))
+        fields = {name: block[name] for name in BLOCK_FIELDS}
+
+        if not verify_block(fields, block['block_hash'], block['hash_version'], block['encoded_data']):
+            problems.append((block['id'], 'hash_mismatch'))
+        if position > 0 and block['previous_hash'] != previous_hash:
+            problems.append((block['id'], 'broken_link'))
+        seal_problem = verify_seal(block['block_hash'], block['verifier_id'], block['encoded_data'],
+                                   block['signature'], difficulty, signature_verifier)
+        if seal_problem:
+            problems.append((block['id'], seal_problem))
+        previous_hash = block['block_hash']
+    return problems
+
+def verify_chains(chains, public_keys=None, difficulty=0):
+    """
+    Verify a batch of journey chains (picklable entry point for process pools).
+
+    Args:
+        chains: List of (waste item id, rows) tuples
+        public_keys: Dictionary mapping verifier ID to raw public key bytes
+        difficulty: Leading '0' hex digits required of mined blocks
+
+    Returns:
+        List of (waste item id, block id, problem) tuples
+    """
+    signature_verifier = signing.SignatureVerifier(public_keys or {})
+    problems = []
+    for waste_item_id, rows in chains:
+        for block_id, problem in verify_chain(rows, signature_verifier, difficulty):
+            problems.append((waste_item_id, block_id, problem))
+    return problems
@@ -0,0 +1,46 @@
+"""
+Verify every waste item's stored journey chain head (head_block_hash,
+current_stage, blocks_count) against its journey blocks.
+Run with --fix to rewrite mismatched items from the chain.
+"""
+
+import sys
+import logging
+import argparse
+from app import app
+from blockchain_service import check_chain_heads
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fix', action='store_true',
+                        help='Rewrite mismatched chain heads from the journey blocks')
+    args = parser.parse_args()
+    
+    with app.app_context():
+        mismatches = check_chain_heads(fix=args.fix)
+    
+    for mismatch in mismatches:
+        logging.warning(
+            f"Waste item {mismatch['waste_item_id']}: stored {mismatch['stored']}, "
+            f"chain {mismatch['expected']}"
+        )
+    
+    if not mismatches:
+        logging.info("All journey chain heads match their blocks.")
+        return 0
+    
+    if args.fix:
+        logging.info(f"Fixed {len(mismatches)} chain head(s).")
+        return 0
+    
+    logging.error(f"{len(mismatches)} chain head(s) do not match their journey blocks.")
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
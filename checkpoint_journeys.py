@@ -0,0 +1,53 @@
+"""
+Create Merkle checkpoints for waste journey blocks added since the last run.
+Run periodically (e.g. from cron). Use --verify to re-check all existing
+checkpoints against the stored block hashes.
+"""
+
+import sys
+import logging
+import argparse
+from app import app
+from audit_service import create_checkpoints, verify_checkpoints, CHECKPOINT_MAX_BLOCKS
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--max-blocks', type=int, default=CHECKPOINT_MAX_BLOCKS,
+                        help='Most blocks covered by one checkpoint')
+    parser.add_argument('--verify', action='store_true',
+                        help='Re-check existing checkpoints instead of creating new ones')
+    args = parser.parse_args()
+    
+    with app.app_context():
+        if args.verify:
+            problems = verify_checkpoints()
+            for problem in problems:
+                logging.error(f"Checkpoint {problem['checkpoint_id']}: {problem['problem']}")
+            if problems:
+                return 1
+            logging.info("All journey checkpoints verify.")
+            return 0
+        
+        checkpoints = create_checkpoints(max_blocks=args.max_blocks)
+        for checkpoint in checkpoints:
+            logging.info(
+                f"Checkpoint {checkpoint.id}: blocks {checkpoint.first_block_id}-{checkpoint.last_block_id} "
+                f"({checkpoint.block_count} blocks, {checkpoint.invalid_blocks} invalid), "
+                f"root {checkpoint.merkle_root}"
+            )
+            if checkpoint.invalid_blocks:
+                logging.warning(f"Checkpoint {checkpoint.id} covers {checkpoint.invalid_blocks} invalid block(s).")
+        
+        if not checkpoints:
+            logging.info("No new journey blocks to checkpoint.")
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
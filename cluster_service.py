@@ -0,0 +1,239 @@
+"""
+Infrastructure map clustering service for WasteWorks.
+Keeps running report counts per geohash cell at each cluster precision, so
+the zoomed-out map reads a handful of precomputed clusters for its viewport
+instead of every report. Counts are adjusted in the same transaction as the
+report change that caused them.
+"""
+
+import logging
+from sqlalchemy.dialects import postgresql, sqlite
+from models import InfrastructureReport, InfrastructureCluster
+from app import db
+import geo
+
+# Geohash precisions clusters are kept at (1 is about 5000 km, 6 about 1 km)
+CLUSTER_PRECISIONS = range(1, 7)
+
+# Smallest on-screen cluster cell width; picks the precision for a zoom level
+MIN_CLUSTER_PIXELS = 64
+
+# Web map tiles are 256 px wide and cover 360 degrees at zoom 0
+TILE_SIZE = 256
+
+# Status counted for reports saved without one
+DEFAULT_STATUS = 'pending'
+
+def precision_for_zoom(zoom):
+    """
+    Pick the cluster precision for a map zoom level.
+
+    Args:
+        zoom: Web map zoom level
+
+    Returns:
+        Geohash precision, or None if the zoom is close enough to show
+        individual reports
+    """
+    degree_pixels = TILE_SIZE * 2 ** zoom / 360.0
+
+    # Finest clusters would still render large, so show the reports themselves
+    if geo.cell_size(CLUSTER_PRECISIONS[-1])[1] * degree_pixels >= MIN_CLUSTER_PIXELS * 4:
+        return None
+
+    for precision in reversed(CLUSTER_PRECISIONS):
+        if geo.cell_size(precision)[1] * degree_pixels >= MIN_CLUSTER_PIXELS:
+            return precision
+    return CLUSTER_PRECISIONS[0]
+
+CLUSTER_KEY = ('precision', 'cell', 'category', 'status', 'severity')
+
+def _merge(rows):
+    """Sum rows that share a cluster key, dropping those that net to nothing"""
+    merged = {}
+    for row in rows:
+        key = tuple(row[name] for name in CLUSTER_KEY)
+        if key in merged:
+            for name in ('report_count', 'latitude_sum', 'longitude_sum'):
+                merged[key][name] += row[name]
+        else:
+            merged[key] = dict(row)
+    return [
+        row for row in merged.values()
+        if row['report_count'] or row['latitude_sum'] or row['longitude_sum']
+    ]
+
+def _upsert(rows):
+    # One INSERT ... ON CONFLICT may not touch the same row twice on PostgreSQL
+    rows = _merge(rows)
+    if not rows:
+        return
+
+    table = InfrastructureCluster.__table__
+    insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+    statement = insert(table).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(CLUSTER_KEY),
+        set_={
+            'report_count': table.c.report_count + statement.excluded.report_count,
+            'latitude_sum': table.c.latitude_sum + statement.excluded.latitude_sum,
+            'longitude_sum': table.c.longitude_sum + statement.excluded.longitude_sum
+        }
+    )
+    db.session.execute(statement)
+
+def _contribution(report, delta, status=None, latitude=None, longitude=None):
+    latitude = report.latitude if latitude is None else latitude
+    longitude = report.longitude if longitude is None else longitude
+    if latitude is None or longitude is None:
+        return []
+
+    geohash = geo.encode_geohash(latitude, longitude)
+    return [{
+        'precision': precision,
+        'cell': geohash[:precision],
+        'category': report.category,
+        'status': status or report.status or DEFAULT_STATUS,
+        'severity': report.severity,
+        'report_count': delta,
+        'latitude_sum': delta * latitude,
+        'longitude_sum': delta * longitude
+    } for precision in CLUSTER_PRECISIONS]
+
+def add_report(report):
+    """
+    Count a new report in its clusters.
+    Only adds to the current session; the caller commits.
+
+    Args:
+        report: InfrastructureReport (reports without coordinates are skipped)
+    """
+    _upsert(_contribution(report, 1))
+
+def move_report(report, old_status=None, old_latitude=None, old_longitude=None):
+    """
+    Move a report's count after its status or coordinates changed.
+    Only adds to the current session; the caller commits.
+
+    Args:
+        report: InfrastructureReport with its new values
+        old_status: Status before the change (unchanged if omitted)
+        old_latitude: Latitude before the change (unchanged if omitted)
+        old_longitude: Longitude before the change (unchanged if omitted)
+    """
+    _upsert(
+        _contribution(report, -1, old_status, latitude=old_latitude, longitude=old_longitude)
+        + _contribution(report, 1)
+    )
+
+def rebuild_clusters():
+    """
+    Recount every cluster from the reports table.
+
+    Returns:
+        Number of cluster rows written
+    """
+    db.session.execute(db.delete(InfrastructureCluster))
+
+    written = 0
+    for precision in CLUSTER_PRECISIONS:
+        cell = db.func.substr(InfrastructureReport.geohash, 1, precision)
+        status = db.func.coalesce(InfrastructureReport.status, DEFAULT_STATUS)
+        rows = db.session.execute(
+            db.select(
+                cell, InfrastructureReport.category, status, InfrastructureReport.severity,
+                db.func.count(), db.func.sum(InfrastructureReport.latitude),
+                db.func.sum(InfrastructureReport.longitude)
+            )
+            .where(InfrastructureReport.geohash.isnot(None))
+            .group_by(cell, InfrastructureReport.category, status, InfrastructureReport.severity)
+        ).all()
+        if not rows:
+            break
+        db.session.execute(db.insert(InfrastructureCluster), [{
+            'precision': precision,
+            'cell': row[0],
+            'category': row[1],
+            'status': row[2],
+            'severity': row[3],
+            'report_count': row[4],
+            'latitude_sum': row[5],
+            'longitude_sum': row[6]
+        } for row in rows])
+        written += len(rows)
+
+    db.session.commit()
+    logging.info(f"Rebuilt {written} infrastructure map cluster row(s).")
+    return written
+
+def _filtered(query, category=None, status=None, severity=None):
+    if category:
+        query = query.where(InfrastructureCluster.category == category)
+    if status:
+        query = query.where(InfrastructureCluster.status == status)
+    if severity:
+        query = query.where(InfrastructureCluster.severity == severity)
+    return query
+
+def get_clusters(south, west, north, east, precision, category=None, status=None, severity=None):
+    """
+    Get the report clusters whose centroid lies in a bounding box.
+
+    Args:
+        south, west, north, east: Box edges in degrees
+        precision: Cluster precision (see precision_for_zoom)
+        category: Only count reports of this category (optional)
+        status: Only count reports with this status (optional)
+        severity: Only count reports with this severity (optional)
+
+    Returns:
+        List of dictionaries with cell, count, latitude and longitude
+    """
+    cell_ranges = [
+        db.and_(InfrastructureCluster.cell >= low, InfrastructureCluster.cell < high)
+        for low, high in map(geo.prefix_range, geo.cover_bbox(south, west, north, east, max_precision=precision))
+    ]
+    query = db.select(
+        InfrastructureCluster.cell,
+        db.func.sum(InfrastructureCluster.report_count),
+        db.func.sum(InfrastructureCluster.latitude_sum),
+        db.func.sum(InfrastructureCluster.longitude_sum)
+    ).where(
+        InfrastructureCluster.precision == precision,
+        InfrastructureCluster.report_count > 0,
+        db.or_(*cell_ranges)
+    ).group_by(InfrastructureCluster.cell)
+
+    clusters = []
+    for cell, count, latitude_sum, longitude_sum in db.session.execute(_filtered(query, category, status, severity)):
+        if not count:
+            continue
+        latitude = latitude_sum / count
+        longitude = longitude_sum / count
+        if geo.in_bbox(latitude, longitude, south, west, north, east):
+            clusters.append({'cell': cell, 'count': count, 'latitude': latitude, 'longitude': longitude})
+    return clusters
+
+def get_report_counts():
+    """
+    Count geotagged reports by status and severity from the coarsest clusters.
+
+    Returns:
+        Dictionary with 'total', 'by_status' and 'by_severity' counts
+    """
+    rows = db.session.execute(
+        db.select(
+            InfrastructureCluster.status,
+            InfrastructureCluster.severity,
+            db.func.sum(InfrastructureCluster.report_count)
+        ).where(
+            InfrastructureCluster.precision == CLUSTER_PRECISIONS[0]
+        ).group_by(InfrastructureCluster.status, InfrastructureCluster.severity)
+    ).all()
+
+    counts = {'total': 0, 'by_status': {}, 'by_severity': {}}
+    for status, severity, count in rows:
+        counts['total'] += count
+        counts['by_status'][status] = counts['by_status'].get(status, 0) + count
+        counts['by_severity'][severity] = counts['by_severity'].get(severity, 0) + count
+    return counts
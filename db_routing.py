@@ -0,0 +1,151 @@
+"""
+Read/write database routing for WasteWorks.
+
+When DATABASE_REPLICA_URL is set, views decorated with @read_only run their
+SELECTs against the replica engine; everything else, every flush, every
+UPDATE/INSERT/DELETE and every SELECT ... FOR UPDATE uses the primary.
+Reads fall back to the primary when the replica is unreachable or lagging
+by more than DATABASE_REPLICA_MAX_LAG_SECONDS, and for a short while after
+the same browser session wrote something (read-your-writes).
+
+To try it locally with SQLite, point the two URLs at different files and
+copy the primary into the replica with `python sync_replica.py`.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import g, has_request_context, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+# Name of the Flask-SQLAlchemy bind used for the replica engine
+REPLICA_BIND_KEY = "replica"
+
+# Flask session key holding the time until which reads stick to the primary
+STICKY_PRIMARY_KEY = "_db_primary_until"
+
+def read_only(view):
+    """Mark a view as read-only so its queries may use the replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+class ReplicaMonitor:
+    """
+    Tracks whether the replica is healthy and caught up.
+    The lag is measured at most once per check interval.
+    """
+
+    def __init__(self, max_lag_seconds=5, check_interval_seconds=10):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._usable = False
+        self.last_lag = None
+
+    def measure_lag(self, engine):
+        """
+        Measure the replica's replication lag in seconds.
+        SQLite file replicas have no replication stream, so their lag is 0.
+        """
+        with engine.connect() as conn:
+            if engine.dialect.name != "postgresql":
+                conn.execute(text("SELECT 1"))
+                return 0.0
+
+            lag = conn.execute(text(
+                "SELECT CASE WHEN pg_is_in_recovery() "
+                "THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) "
+                "ELSE 0 END"
+            )).scalar()
+            return float(lag or 0)
+
+    def is_usable(self, engine):
+        """Return True if reads may be sent to the replica engine"""
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval_seconds:
+                return self._usable
+            self._checked_at = now
+
+        try:
+            lag = self.measure_lag(engine)
+            usable = lag <= self.max_lag_seconds
+            if not usable:
+                logging.warning(f"Replica lag {lag:.1f}s exceeds limit, reading from primary")
+        except Exception as e:
+            lag = None
+            usable = False
+            logging.warning(f"Replica unavailable, reading from primary: {e}")
+
+        with self._lock:
+            self.last_lag = lag
+            self._usable = usable
+        return usable
+
+replica_monitor = ReplicaMonitor()
+
+def _is_write_clause(clause):
+    """Return True for statements that must run on the primary"""
+    if clause is None:
+        return False
+    if getattr(clause, "is_dml", False):
+        return True
+    return getattr(clause, "_for_update_arg", None) is not None
+
+def _wants_replica():
+    """Return True if the current request may read from the replica"""
+    if not has_request_context() or not g.get("db_read_only"):
+        return False
+    return flask_session.get(STICKY_PRIMARY_KEY, 0) < time.time()
+
+class RoutingSession(Session):
+    """Session that sends read-only request reads to the replica engine"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get("has_writes"):
+            replica = self._db.engines.get(REPLICA_BIND_KEY)
+            if (replica is not None and not _is_write_clause(clause)
+                    and _wants_replica() and replica_monitor.is_usable(replica)):
+                return replica
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_session_writes(session, flush_context):
+    session.info["has_writes"] = True
+
+@event.listens_for(RoutingSession, "after_bulk_update")
+@event.listens_for(RoutingSession, "after_bulk_delete")
+def _mark_bulk_writes(update_context):
+    update_context.session.info["has_writes"] = True
+
+@event.listens_for(RoutingSession, "after_commit")
+def _stick_to_primary(session):
+    # Keep this browser on the primary until the replica has caught up
+    if (session.info.get("has_writes") and has_request_context()
+            and REPLICA_BIND_KEY in session._db.engines):
+        flask_session[STICKY_PRIMARY_KEY] = time.time() + replica_monitor.max_lag_seconds
+
+def sync_sqlite_replica(primary_path, replica_path):
+    """
+    Copy a SQLite primary database into a replica file.
+    Only meant for trying out replica routing locally.
+
+    Args:
+        primary_path: Path of the primary database file
+        replica_path: Path of the replica database file
+    """
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
@@ -0,0 +1,43 @@
+"""
+Bulk export routes for WasteWorks.
+Streams full dumps of waste, journey and infrastructure data for municipal partners.
+"""
+
+from flask import Response, request, abort, stream_with_context
+from flask_login import login_required
+from db_routing import read_only
+import export_service
+
+def register_export_routes(app):
+    """Register bulk export routes"""
+
+    @app.route('/export/<dataset>.<export_format>')
+    @login_required
+    @read_only
+    def export_dataset(dataset, export_format):
+        """
+        Stream a dataset as CSV or NDJSON.
+        Optional query parameters: start and end (ISO dates) and gzip=1.
+        """
+        if dataset not in export_service.EXPORT_DATASETS or export_format not in export_service.EXPORT_FORMATS:
+            abort(404)
+        
+        try:
+            start = export_service.parse_export_date(request.args.get('start'))
+            end = export_service.parse_export_date(request.args.get('end'))
+        except ValueError:
+            abort(400, description='start and end must be ISO dates, e.g. 2024-01-31')
+        
+        compressed = request.args.get('gzip') in ('1', 'true', 'yes')
+        chunks = export_service.iter_export_chunks(dataset, export_format, start, end)
+        if compressed:
+            chunks = export_service.gzip_chunks(chunks)
+        
+        filename = export_service.get_export_filename(dataset, export_format, compressed)
+        response = Response(
+            stream_with_context(chunks),
+            mimetype='application/gzip' if compressed else export_service.EXPORT_FORMATS[export_format]
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.headers['X-Accel-Buffering'] = 'no'  # Let proxies pass chunks through
+        return response
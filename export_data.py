@@ -0,0 +1,52 @@
+"""
+Export WasteWorks data to a CSV or NDJSON file from the command line.
+
+    python export_data.py waste_items --format ndjson --gzip --start 2024-01-01 -o waste.ndjson.gz
+"""
+
+import sys
+import logging
+import argparse
+from app import app
+import export_service
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+
+def main():
+    parser = argparse.ArgumentParser(description='Export WasteWorks data')
+    parser.add_argument('dataset', choices=sorted(export_service.EXPORT_DATASETS))
+    parser.add_argument('--format', dest='export_format', choices=sorted(export_service.EXPORT_FORMATS), default='csv')
+    parser.add_argument('--start', help='Only rows on or after this ISO date')
+    parser.add_argument('--end', help='Only rows before this ISO date')
+    parser.add_argument('--gzip', action='store_true', help='Gzip the output')
+    parser.add_argument('-o', '--output', help='Output file (defaults to stdout)')
+    args = parser.parse_args()
+    
+    try:
+        start = export_service.parse_export_date(args.start)
+        end = export_service.parse_export_date(args.end)
+    except ValueError:
+        parser.error('--start and --end must be ISO dates, e.g. 2024-01-31')
+    
+    output = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    written = 0
+    try:
+        with app.app_context():
+            chunks = export_service.iter_export_chunks(args.dataset, args.export_format, start, end)
+            if args.gzip:
+                chunks = export_service.gzip_chunks(chunks)
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+    finally:
+        if args.output:
+            output.close()
+    
+    logging.info(f"Exported {args.dataset} ({written} bytes)")
+
+if __name__ == '__main__':
+    main()
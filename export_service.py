@@ -0,0 +1,186 @@
+"""
+Bulk data export service for WasteWorks.
+Streams full table dumps for municipal partners as CSV or newline-delimited
+JSON. Rows are read in chunks through a server-side cursor and written out
+as they arrive, so memory use does not grow with the size of the table.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, date
+from models import WasteItem, WasteJourneyBlock, InfrastructureReport
+from app import db
+
+# Rows fetched from the database per round trip
+EXPORT_CHUNK_SIZE = 1000
+
+# Exportable datasets: model and the timestamp column used for date filters
+EXPORT_DATASETS = {
+    'waste_items': {
+        'model': WasteItem,
+        'date_column': 'created_at'
+    },
+    'journey_blocks': {
+        'model': WasteJourneyBlock,
+        'date_column': 'timestamp'
+    },
+    'infrastructure_reports': {
+        'model': InfrastructureReport,
+        'date_column': 'reported_at'
+    }
+}
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+def parse_export_date(value):
+    """
+    Parse a date filter from an ISO date or datetime string.
+
+    Args:
+        value: String such as '2024-01-31' or '2024-01-31T12:00:00'
+
+    Returns:
+        Datetime, or None if no value was given
+
+    Raises:
+        ValueError: If the value is not a valid ISO date
+    """
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
+
+def get_export_columns(dataset):
+    """
+    Get the table columns exported for a dataset.
+
+    Args:
+        dataset: Dataset name from EXPORT_DATASETS
+
+    Returns:
+        List of SQLAlchemy Column objects
+    """
+    return list(EXPORT_DATASETS[dataset]['model'].__table__.columns)
+
+def iter_export_rows(dataset, start=None, end=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream the rows of a dataset as tuples in primary key order.
+
+    Args:
+        dataset: Dataset name from EXPORT_DATASETS
+        start: Only include rows on or after this datetime (optional)
+        end: Only include rows before this datetime (optional)
+        chunk_size: Rows fetched per round trip
+
+    Yields:
+        Tuples of column values
+    """
+    config = EXPORT_DATASETS[dataset]
+    table = config['model'].__table__
+    date_column = table.c[config['date_column']]
+
+    # Select plain columns rather than ORM objects so nothing accumulates in
+    # the session's identity map
+    query = db.select(*table.columns).order_by(table.c.id)
+    if start:
+        query = query.where(date_column >= start)
+    if end:
+        query = query.where(date_column < end)
+
+    result = db.session.execute(query.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        for row in partition:
+            yield tuple(row)
+
+def _to_json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return value
+
+def _to_csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+def iter_export_chunks(dataset, export_format='csv', start=None, end=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream a dataset encoded as CSV or NDJSON.
+
+    Args:
+        dataset: Dataset name from EXPORT_DATASETS
+        export_format: 'csv' or 'ndjson'
+        start: Only include rows on or after this datetime (optional)
+        end: Only include rows before this datetime (optional)
+        chunk_size: Rows encoded per yielded chunk
+
+    Yields:
+        Encoded chunks of the export as bytes
+    """
+    column_names = [column.name for column in get_export_columns(dataset)]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+
+    if writer:
+        writer.writerow(column_names)
+
+    rows_in_buffer = 0
+    for row in iter_export_rows(dataset, start, end, chunk_size):
+        if writer:
+            writer.writerow([_to_csv_value(value) for value in row])
+        else:
+            record = {name: _to_json_value(value) for name, value in zip(column_names, row)}
+            buffer.write(json.dumps(record))
+            buffer.write('\n')
+
+        rows_in_buffer += 1
+        if rows_in_buffer >= chunk_size:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            rows_in_buffer = 0
+
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def gzip_chunks(chunks):
+    """
+    Gzip-compress a stream of byte chunks without buffering the whole stream.
+
+    Args:
+        chunks: Iterable of bytes
+
+    Yields:
+        Gzip-compressed bytes
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def get_export_filename(dataset, export_format, compressed=False):
+    """
+    Build the download filename for an export.
+
+    Args:
+        dataset: Dataset name
+        export_format: 'csv' or 'ndjson'
+        compressed: Whether the export is gzipped
+
+    Returns:
+        Filename string
+    """
+    timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+    filename = f"wasteworks_{dataset}_{timestamp}.{export_format}"
+    return f"{filename}.gz" if compressed else filename
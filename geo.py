@@ -0,0 +1,166 @@
+"""
+Geohash spatial indexing helpers for WasteWorks.
+
+Reports store the geohash of their coordinates in an indexed column. A
+geohash cell's code is a prefix of the code of every point inside it, so
+"all reports in a cell" is a range scan on that index. Area queries cover
+the search box with a few cells at a suitable precision, fetch only the
+rows in those cells, then filter them exactly.
+
+This module has no app imports.
+"""
+
+import math
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Precision stored per report (about 5 m x 5 m cells)
+GEOHASH_PRECISION = 9
+
+# Most cells used to cover one query area; fewer, larger cells mean more
+# candidate rows, more cells mean more index range scans
+MAX_COVER_CELLS = 16
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Sorts after every geohash character, closing a prefix range
+_PREFIX_END = '~'
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """
+    Encode coordinates as a geohash.
+
+    Args:
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+        precision: Number of characters
+
+    Returns:
+        Geohash string
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    code = []
+    bits = 0
+    bit_count = 0
+    even_bit = True  # Bits alternate, starting with longitude
+
+    while len(code) < precision:
+        value, value_range = (longitude, lng_range) if even_bit else (latitude, lat_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        even_bit = not even_bit
+
+        bit_count += 1
+        if bit_count == 5:
+            code.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(code)
+
+def cell_size(precision):
+    """
+    Get the size of a geohash cell.
+
+    Returns:
+        Tuple of (height, width) in degrees
+    """
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+def _cover_at(south, west, north, east, precision):
+    height, width = cell_size(precision)
+    first_row = int((max(south, -90.0) + 90.0) // height)
+    last_row = min(int((min(north, 90.0) + 90.0) // height), int(180.0 / height) - 1)
+    first_column = int((west + 180.0) // width)
+    last_column = int((east + 180.0) // width)
+    if east < west:  # Box crosses the antimeridian
+        last_column += int(360.0 / width)
+
+    columns_per_world = int(360.0 / width)
+    cells = []
+    for row in range(first_row, last_row + 1):
+        latitude = -90.0 + (row + 0.5) * height
+        for column in range(first_column, last_column + 1):
+            longitude = -180.0 + (column % columns_per_world + 0.5) * width
+            cells.append(encode_geohash(latitude, longitude, precision))
+    return cells
+
+def cover_bbox(south, west, north, east, max_cells=MAX_COVER_CELLS, max_precision=GEOHASH_PRECISION):
+    """
+    Cover a bounding box with geohash cells.
+
+    Args:
+        south, west, north, east: Box edges in degrees (west > east crosses the antimeridian)
+        max_cells: Most cells to return
+        max_precision: Longest prefix to return
+
+    Returns:
+        Sorted list of geohash prefixes whose cells together contain the box
+    """
+    lng_span = east - west if west <= east else east - west + 360.0
+    best = ['']  # The empty prefix covers the whole world
+    for precision in range(1, max_precision + 1):
+        height, width = cell_size(precision)
+        estimate = (math.floor((north - south) / height) + 2) * (math.floor(lng_span / width) + 2)
+        if estimate > max_cells * 4:
+            break
+        cells = _cover_at(south, west, north, east, precision)
+        if len(cells) > max_cells:
+            break
+        best = cells
+    return sorted(set(best))
+
+def prefix_range(prefix):
+    """
+    Get the index range holding every geohash that starts with a prefix.
+
+    Returns:
+        Tuple of (inclusive lower bound, exclusive upper bound)
+    """
+    return prefix, prefix + _PREFIX_END
+
+def bbox_around(latitude, longitude, radius_km):
+    """
+    Get a bounding box that contains a circle.
+
+    Returns:
+        Tuple of (south, west, north, east) in degrees
+    """
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    south = max(latitude - lat_delta, -90.0)
+    north = min(latitude + lat_delta, 90.0)
+
+    # Near a pole the circle spans every longitude
+    cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+    if cos_lat <= 0 or lat_delta / cos_lat >= 180.0:
+        return south, -180.0, north, 180.0
+
+    lng_delta = lat_delta / cos_lat
+    west = (longitude - lng_delta + 180.0) % 360.0 - 180.0
+    east = (longitude + lng_delta + 180.0) % 360.0 - 180.0
+    return south, west, north, east
+
+def in_bbox(latitude, longitude, south, west, north, east):
+    """Return True if a point lies inside a bounding box"""
+    if not south <= latitude <= north:
+        return False
+    if west <= east:
+        return west <= longitude <= east
+    return longitude >= west or longitude <= east
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometers"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,234 @@
+"""
+Infrastructure report heatmap tile service for WasteWorks.
+Renders density heatmaps of open infrastructure reports as standard
+256 px web map tiles (z/x/y, Web Mercator), optionally for one category
+and/or severity. Each tile is a 2D histogram of the reports around it,
+smoothed and colored, and is cached on disk until a report inside it is
+added or changes status, or the tile expires.
+"""
+
+import io
+import math
+import os
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+from app import app
+import infrastructure_service
+
+TILE_SIZE = 256
+
+# Zoom levels tiles are served for
+HEATMAP_MIN_ZOOM = 0
+HEATMAP_MAX_ZOOM = 18
+
+# Smoothing kernel (binomial, applied along both axes)
+KERNEL = np.array([1, 6, 15, 20, 15, 6, 1], dtype=float) / 64
+
+# Pixels per histogram bin, and bins read past each tile edge: the kernel
+# radius plus one bin to interpolate across, so neighbouring tiles match
+BIN_PIXELS = 4
+MARGIN_BINS = len(KERNEL) // 2 + 1
+TILE_BINS = TILE_SIZE // BIN_PIXELS
+
+# Reports per bin that render at full intensity at the reference zoom; the
+# limit doubles per zoom level out, so dense areas stay distinguishable
+SATURATION_COUNT = 4
+SATURATION_REFERENCE_ZOOM = 16
+
+# Closed reports are left off the heatmap
+EXCLUDED_STATUSES = ('resolved', 'rejected')
+
+# Color stops from low to high density: (position, (red, green, blue, alpha))
+COLOR_STOPS = (
+    (0.0, (0, 0, 255, 0)),
+    (0.25, (0, 128, 255, 140)),
+    (0.5, (0, 220, 120, 170)),
+    (0.75, (255, 220, 0, 200)),
+    (1.0, (220, 0, 0, 230))
+)
+
+# Filter value used in cache paths for "every category/severity"
+ALL = 'all'
+
+def _world_pixels(zoom):
+    return TILE_SIZE * 2 ** zoom
+
+def _project(latitudes, longitudes, zoom):
+    """Project coordinates to global Web Mercator pixel coordinates"""
+    latitudes = np.clip(latitudes, -85.05112878, 85.05112878)
+    world = _world_pixels(zoom)
+    x = (longitudes + 180.0) / 360.0 * world
+    sin_lat = np.sin(np.radians(latitudes))
+    y = (0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * world
+    return x, y
+
+def _unproject(x, y, zoom):
+    """Convert global pixel coordinates to (latitude, longitude)"""
+    world = _world_pixels(zoom)
+    longitude = x / world * 360.0 - 180.0
+    latitude = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / world))))
+    return latitude, longitude
+
+def is_valid_tile(zoom, x, y):
+    """Return True if z/x/y names a tile this service renders"""
+    return HEATMAP_MIN_ZOOM <= zoom <= HEATMAP_MAX_ZOOM and 0 <= x < 2 ** zoom and 0 <= y < 2 ** zoom
+
+def get_tile_path(zoom, x, y, category=None, severity=None):
+    """
+    Get the cache path of a heatmap tile.
+
+    Args:
+        zoom, x, y: Tile coordinates
+        category: Infrastructure category, or None for all
+        severity: Severity level, or None for all
+
+    Returns:
+        File path (which may not exist yet)
+    """
+    return os.path.join(
+        app.config["HEATMAP_TILE_FOLDER"], category or ALL, severity or ALL,
+        str(zoom), str(x), f"{y}.png"
+    )
+
+def _histogram(zoom, x, y, category, severity):
+    """Count the reports per bin over the tile plus its margin"""
+    margin_pixels = MARGIN_BINS * BIN_PIXELS
+    left = x * TILE_SIZE - margin_pixels
+    top = y * TILE_SIZE - margin_pixels
+    right = (x + 1) * TILE_SIZE + margin_pixels
+    bottom = (y + 1) * TILE_SIZE + margin_pixels
+
+    north, west = _unproject(left, top, zoom)
+    south, east = _unproject(right, bottom, zoom)
+    points = infrastructure_service.get_report_points_in_bbox(
+        south, max(west, -180.0), north, min(east, 180.0),
+        category=category, severity=severity, excluded_statuses=EXCLUDED_STATUSES
+    )
+
+    bins = TILE_BINS + 2 * MARGIN_BINS
+    if not points:
+        return np.zeros((bins, bins))
+
+    coordinates = np.array(points, dtype=float)
+    pixel_x, pixel_y = _project(coordinates[:, 0], coordinates[:, 1], zoom)
+
+    # Rows are y (north to south), columns are x; points outside the range are dropped
+    counts, _, _ = np.histogram2d(
+        pixel_y, pixel_x, bins=bins,
+        range=[[top, bottom], [left, right]]
+    )
+    return counts
+
+def _smooth(counts):
+    """Blur along both axes, keeping one bin past each tile edge"""
+    trim = len(KERNEL) - 1
+    rows = sum(weight * counts[index:counts.shape[0] - trim + index] for index, weight in enumerate(KERNEL))
+    return sum(weight * rows[:, index:rows.shape[1] - trim + index] for index, weight in enumerate(KERNEL))
+
+def _upsample(density):
+    """Bilinearly interpolate bin densities at every tile pixel center"""
+    # Pixel centers in bin units of the padded grid, whose first bin lies past the tile edge
+    positions = (np.arange(TILE_SIZE) + 0.5) / BIN_PIXELS + 0.5
+    low = np.floor(positions).astype(int)
+    fraction = positions - low
+    rows = density[low] * (1 - fraction)[:, None] + density[low + 1] * fraction[:, None]
+    return rows[:, low] * (1 - fraction)[None, :] + rows[:, low + 1] * fraction[None, :]
+
+def _colorize(density, zoom):
+    """Map bin densities to RGBA pixels"""
+    saturation = SATURATION_COUNT * 2 ** max(0, SATURATION_REFERENCE_ZOOM - zoom)
+    intensity = np.clip(np.log1p(density) / math.log1p(saturation), 0.0, 1.0)
+
+    positions = [stop[0] for stop in COLOR_STOPS]
+    rgba = np.empty(intensity.shape + (4,), dtype=np.uint8)
+    for channel in range(4):
+        rgba[..., channel] = np.interp(intensity, positions, [stop[1][channel] for stop in COLOR_STOPS])
+    rgba[density <= 0.01, 3] = 0  # Fully transparent where there are no reports
+    return rgba
+
+def render_tile(zoom, x, y, category=None, severity=None):
+    """
+    Render a heatmap tile.
+
+    Args:
+        zoom, x, y: Tile coordinates
+        category: Infrastructure category, or None for all
+        severity: Severity level, or None for all
+
+    Returns:
+        PNG bytes
+    """
+    density = _upsample(_smooth(_histogram(zoom, x, y, category, severity)))
+    image = Image.fromarray(_colorize(density, zoom), 'RGBA')
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+def get_tile(zoom, x, y, category=None, severity=None):
+    """
+    Get a cached heatmap tile, rendering it if needed.
+
+    Args:
+        zoom, x, y: Tile coordinates
+        category: Infrastructure category, or None for all
+        severity: Severity level, or None for all
+
+    Returns:
+        Path of the tile file (re-rendered once older than HEATMAP_TILE_TTL_SECONDS)
+    """
+    path = get_tile_path(zoom, x, y, category, severity)
+    try:
+        # A render that read the reports just before another worker committed
+        # one can land after that commit's invalidation, so tiles also expire
+        if time.time() - os.path.getmtime(path) < app.config["HEATMAP_TILE_TTL_SECONDS"]:
+            return path
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.tmp', delete=False) as tile_file:
+        tile_file.write(render_tile(zoom, x, y, category, severity))
+    os.replace(tile_file.name, path)  # Atomic, so concurrent workers never serve a partial file
+    return path
+
+def _touched_tiles(latitude, longitude):
+    """Yield every (zoom, x, y) tile whose rendering includes a point"""
+    margin_pixels = MARGIN_BINS * BIN_PIXELS
+    for zoom in range(HEATMAP_MIN_ZOOM, HEATMAP_MAX_ZOOM + 1):
+        pixel_x, pixel_y = _project(np.array([latitude]), np.array([longitude]), zoom)
+        tiles_per_side = 2 ** zoom
+        first_x = max(int((pixel_x[0] - margin_pixels) // TILE_SIZE), 0)
+        last_x = min(int((pixel_x[0] + margin_pixels) // TILE_SIZE), tiles_per_side - 1)
+        first_y = max(int((pixel_y[0] - margin_pixels) // TILE_SIZE), 0)
+        last_y = min(int((pixel_y[0] + margin_pixels) // TILE_SIZE), tiles_per_side - 1)
+        for x in range(first_x, last_x + 1):
+            for y in range(first_y, last_y + 1):
+                yield zoom, x, y
+
+def invalidate_report_tiles(report):
+    """
+    Drop the cached tiles a report appears in, so they are re-rendered on
+    their next request. Call after the report change is committed.
+
+    Args:
+        report: InfrastructureReport that was added or changed
+
+    Returns:
+        Number of cached tiles removed
+    """
+    if report.latitude is None or report.longitude is None:
+        return 0
+
+    removed = 0
+    for zoom, x, y in _touched_tiles(report.latitude, report.longitude):
+        for category in (None, report.category):
+            for severity in (None, report.severity):
+                try:
+                    os.remove(get_tile_path(zoom, x, y, category, severity))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+    return removed
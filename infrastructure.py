@@ -5,12 +5,21 @@ Handles the infrastructure reporting system with webcam uploads.
 
 import os
 from datetime import datetime
-from flask import render_template, request, redirect, url_for, flash, jsonify
+from flask import render_template, request, redirect, url_for, flash, jsonify, abort, send_file
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 import infrastructure_service
+import cluster_service
+import heatmap_service
+from db_routing import read_only
 from models import InfrastructureReport
 
+# Most individual reports returned for one zoomed-in map viewport
+MAP_MAX_REPORTS = 2000
+
+# Cache lifetime of heatmap tiles; after it, clients revalidate with the tile's ETag
+HEATMAP_TILE_MAX_AGE_SECONDS = 300
+
 def register_infrastructure_routes(app):
     """Register infrastructure reporting routes"""
 
@@ -105,12 +114,10 @@ def register_infrastructure_routes(app):
                 location_description=location_description,
                 latitude=latitude,
                 longitude=longitude,
-                image_file=None  # Already saved the image
+                image_file=None,  # Already saved the image
+                image_path=image_path
             )
             
-            # Update the image path directly
-            report.image_path = image_path
-            
             flash('Thank you for reporting this infrastructure issue!', 'success')
             return redirect(url_for('view_report', report_id=report.id))
         
@@ -169,15 +176,14 @@ def register_infrastructure_routes(app):
         )
     
     @app.route('/infrastructure/reports/map')
+    @read_only
     def infrastructure_map():
         """
         Display a map of all reported infrastructure issues
         """
-        # Get all reports with coordinates
-        reports = InfrastructureReport.query.filter(
-            InfrastructureReport.latitude.isnot(None),
-            InfrastructureReport.longitude.isnot(None)
-        ).all()
+        # Reports are fetched per viewport from the GeoJSON API, so the page
+        # only needs the totals, which come from the coarsest clusters
+        report_counts = cluster_service.get_report_counts()
         
         categories = infrastructure_service.get_infrastructure_categories()
         severity_levels = infrastructure_service.get_severity_levels()
@@ -185,12 +191,109 @@ def register_infrastructure_routes(app):
         
         return render_template(
             'infrastructure_map.html',
-            reports=reports,
+            report_counts=report_counts,
             categories=categories,
             severity_levels=severity_levels,
             status_types=status_types
         )
     
+    @app.route('/api/infrastructure/map')
+    @read_only
+    def api_infrastructure_map():
+        """
+        GeoJSON of the infrastructure map viewport.
+        Expects bbox=west,south,east,north in degrees and the map zoom level,
+        plus optional category, status and severity filters. Returns report
+        clusters when zoomed out and individual reports when zoomed in.
+        """
+        try:
+            west, south, east, north = (float(value) for value in request.args.get('bbox', '').split(','))
+            zoom = float(request.args.get('zoom', ''))
+        except ValueError:
+            return jsonify({'error': 'bbox must be west,south,east,north and zoom a number'}), 400
+        
+        # Clamp the viewport to the world; maps scrolled past the antimeridian wrap
+        south, north = max(south, -90.0), min(north, 90.0)
+        if east - west >= 360.0:
+            west, east = -180.0, 180.0
+        else:
+            west, east = (_wrap_longitude(west), _wrap_longitude(east))
+        
+        filters = {
+            name: request.args.get(name)
+            for name in ('category', 'status', 'severity')
+            if request.args.get(name) not in (None, '', 'all')
+        }
+        
+        precision = cluster_service.precision_for_zoom(zoom)
+        if precision is None:
+            reports = infrastructure_service.get_reports_in_bbox(
+                south, west, north, east, limit=MAP_MAX_REPORTS, **filters
+            )
+            features = [_report_feature(report) for report in reports]
+        else:
+            clusters = cluster_service.get_clusters(south, west, north, east, precision, **filters)
+            features = [_cluster_feature(cluster) for cluster in clusters]
+        
+        return jsonify({'type': 'FeatureCollection', 'features': features})
+    
+    def _wrap_longitude(longitude):
+        if -180.0 <= longitude <= 180.0:
+            return longitude
+        return (longitude + 180.0) % 360.0 - 180.0
+    
+    def _report_feature(report):
+        status_types = infrastructure_service.get_status_types()
+        return {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [report.longitude, report.latitude]},
+            'properties': {
+                'cluster': False,
+                'id': report.id,
+                'title': report.title,
+                'category': report.category,
+                'status': report.status,
+                'severity': report.severity,
+                'date': report.reported_at.strftime('%Y-%m-%d') if report.reported_at else None,
+                'image': url_for('static', filename=report.image_path) if report.image_path else None,
+                'location': report.location_description,
+                'statusText': status_types[report.status]['name'] if report.status in status_types else report.status
+            }
+        }
+    
+    def _cluster_feature(cluster):
+        return {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [cluster['longitude'], cluster['latitude']]},
+            'properties': {'cluster': True, 'cell': cluster['cell'], 'count': cluster['count']}
+        }
+    
+    @app.route('/infrastructure/heatmap/<int:zoom>/<int:x>/<int:y>.png')
+    @read_only
+    def infrastructure_heatmap_tile(zoom, x, y):
+        """
+        Heatmap tile of open infrastructure reports, optionally filtered by
+        category and severity. Rendered once and then served from the disk
+        cache until a report inside the tile changes.
+        """
+        category = request.args.get('category')
+        severity = request.args.get('severity')
+        if category in ('', 'all'):
+            category = None
+        if severity in ('', 'all'):
+            severity = None
+        
+        if (not heatmap_service.is_valid_tile(zoom, x, y)
+                or (category and category not in infrastructure_service.INFRASTRUCTURE_CATEGORIES)
+                or (severity and severity not in infrastructure_service.SEVERITY_LEVELS)):
+            abort(404)
+        
+        return send_file(
+            heatmap_service.get_tile(zoom, x, y, category, severity),
+            mimetype='image/png',
+            max_age=HEATMAP_TILE_MAX_AGE_SECONDS
+        )
+    
     @app.route('/infrastructure/update-status/<int:report_id>', methods=['POST'])
     @login_required
     def update_infrastructure_status(report_id):
@@ -5,8 +5,11 @@ This module handles the creation and management of infrastructure reports.
 
 import os
 from datetime import datetime
-from models import InfrastructureReport, User
+from models import InfrastructureReport
 from app import db
+from rewards import award_points
+import cluster_service
+import geo
 from werkzeug.utils import secure_filename
 
 # Define infrastructure categories
@@ -131,7 +134,8 @@ def save_infrastructure_image(image_file, report_id):
     return os.path.join('uploads', 'infrastructure', filename)
 
 def create_infrastructure_report(user_id, title, description, category, severity, 
-                                location_description, latitude, longitude, image_file):
+                                location_description, latitude, longitude, image_file,
+                                image_path=None):
     """
     Create a new infrastructure report.
     
@@ -145,11 +149,12 @@ def create_infrastructure_report(user_id, title, description, category, severity
         latitude: GPS latitude (optional)
         longitude: GPS longitude (optional)
         image_file: Uploaded image file
+        image_path: Path of an image that was already saved (optional)
         
     Returns:
         Newly created InfrastructureReport
     """
-    # Create a placeholder report to get an ID
+    # Create the report first to get an ID for the image file name
     new_report = InfrastructureReport(
         user_id=user_id,
         title=title,
@@ -159,7 +164,7 @@ def create_infrastructure_report(user_id, title, description, category, severity
         location_description=location_description,
         latitude=latitude,
         longitude=longitude,
-        image_path='',  # Placeholder, will update after saving the image
+        image_path=image_path or None,
         status='pending'
     )
     
@@ -172,14 +177,18 @@ def create_infrastructure_report(user_id, title, description, category, severity
         image_path = save_infrastructure_image(image_file, new_report.id)
         new_report.image_path = image_path
     
-    # Commit to database
-    db.session.commit()
+    # Count the report in the map clusters
+    cluster_service.add_report(new_report)
     
     # Award points to the user for reporting (gamification)
-    user = User.query.get(user_id)
-    if user:
-        user.eco_points += 20  # Award points for civic engagement
-        db.session.commit()
+    award_points(user_id, 20, f"Reported infrastructure issue: {title}", "infrastructure")
+    
+    # Commit the report and its rewards together
+    db.session.commit()
+    
+    # Re-render the heatmap tiles around the new report on their next request
+    import heatmap_service
+    heatmap_service.invalidate_report_tiles(new_report)
     
     return new_report
 
@@ -200,20 +209,26 @@ def update_report_status(report_id, status, municipality_notes=None):
     if not report:
         return None
     
+    old_status = report.status
     report.status = status
     report.status_updated_at = datetime.utcnow()
+    if status != old_status:
+        cluster_service.move_report(report, old_status=old_status)
     
     if municipality_notes:
         report.municipality_notes = municipality_notes
     
-    db.session.commit()
-    
     # If resolved, award additional points to the reporter
     if status == 'resolved':
-        user = User.query.get(report.user_id)
-        if user:
-            user.eco_points += 30  # Bonus for resolved reports
-            db.session.commit()
+        award_points(report.user_id, 30, f"Infrastructure report resolved: {report.title}", "infrastructure")
+    
+    # Commit the status change and its rewards together
+    db.session.commit()
+    
+    # Closing or reopening a report changes the heatmap around it
+    import heatmap_service
+    if (old_status in heatmap_service.EXCLUDED_STATUSES) != (status in heatmap_service.EXCLUDED_STATUSES):
+        heatmap_service.invalidate_report_tiles(report)
     
     return report
 
@@ -259,9 +274,87 @@ def get_reports_by_status(status):
         InfrastructureReport.reported_at.desc()
     ).all()
 
+def _query_cells(south, west, north, east):
+    """Query the reports whose geohash falls in the cells covering a box"""
+    cell_ranges = [
+        db.and_(InfrastructureReport.geohash >= low, InfrastructureReport.geohash < high)
+        for low, high in map(geo.prefix_range, geo.cover_bbox(south, west, north, east))
+    ]
+    return InfrastructureReport.query.filter(db.or_(*cell_ranges))
+
+def get_reports_in_bbox(south, west, north, east, category=None, status=None, severity=None, limit=None):
+    """
+    Get infrastructure reports inside a bounding box.
+    
+    Args:
+        south: Southern latitude
+        west: Western longitude
+        north: Northern latitude
+        east: Eastern longitude (less than west if the box crosses the antimeridian)
+        category: Only reports of this category (optional)
+        status: Only reports with this status (optional)
+        severity: Only reports with this severity (optional)
+        limit: Most reports to return, newest first (optional)
+        
+    Returns:
+        List of InfrastructureReport objects
+    """
+    # The cells narrow the scan through the geohash index; the exact box
+    # test runs in the database too, so the limit bounds the rows loaded
+    if west <= east:
+        in_longitude = InfrastructureReport.longitude.between(west, east)
+    else:
+        in_longitude = db.or_(InfrastructureReport.longitude >= west, InfrastructureReport.longitude <= east)
+    query = _query_cells(south, west, north, east).filter(
+        InfrastructureReport.latitude.between(south, north),
+        in_longitude
+    )
+    if category:
+        query = query.filter(InfrastructureReport.category == category)
+    if status:
+        query = query.filter(InfrastructureReport.status == status)
+    if severity:
+        query = query.filter(InfrastructureReport.severity == severity)
+    
+    query = query.order_by(InfrastructureReport.reported_at.desc(), InfrastructureReport.id.desc())
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+def get_report_points_in_bbox(south, west, north, east, category=None, severity=None, excluded_statuses=()):
+    """
+    Get the coordinates of reports in the geohash cells covering a box.
+    Only the two coordinate columns are loaded; points just outside the box
+    may be included, so callers filter by position themselves.
+    
+    Args:
+        south, west, north, east: Box edges in degrees
+        category: Only reports of this category (optional)
+        severity: Only reports with this severity (optional)
+        excluded_statuses: Leave out reports with these statuses
+        
+    Returns:
+        List of (latitude, longitude) tuples
+    """
+    query = _query_cells(south, west, north, east).with_entities(
+        InfrastructureReport.latitude, InfrastructureReport.longitude
+    )
+    if category:
+        query = query.filter(InfrastructureReport.category == category)
+    if severity:
+        query = query.filter(InfrastructureReport.severity == severity)
+    if excluded_statuses:
+        query = query.filter(db.or_(
+            InfrastructureReport.status.is_(None),
+            InfrastructureReport.status.notin_(excluded_statuses)
+        ))
+    return query.all()
+
 def get_reports_near_location(latitude, longitude, radius_km=5):
     """
     Get infrastructure reports near a specific location.
+    Only reports in the geohash cells around the circle are loaded, then
+    filtered by great-circle distance.
     
     Args:
         latitude: Center latitude
@@ -269,27 +362,15 @@ def get_reports_near_location(latitude, longitude, radius_km=5):
         radius_km: Search radius in kilometers
         
     Returns:
-        List of InfrastructureReport objects
+        List of InfrastructureReport objects, nearest first
     """
-    # This is a simplified version - in production you would use
-    # proper geospatial queries with PostGIS or similar
-    reports = InfrastructureReport.query.filter(
-        InfrastructureReport.latitude.isnot(None),
-        InfrastructureReport.longitude.isnot(None)
-    ).all()
+    candidates = _query_cells(*geo.bbox_around(latitude, longitude, radius_km)).all()
     
-    # Filter reports within radius (simplified calculation)
-    # In production, use proper geospatial distance calculation
     nearby_reports = []
-    for report in reports:
-        # Simple approximation: 1 degree ≈ 111km
-        lat_diff = abs(report.latitude - latitude)
-        lng_diff = abs(report.longitude - longitude)
-        
-        # Rough distance calculation (not accounting for earth's curvature)
-        approx_distance = ((lat_diff * 111) ** 2 + (lng_diff * 111) ** 2) ** 0.5
-        
-        if approx_distance <= radius_km:
-            nearby_reports.append(report)
+    for report in candidates:
+        distance = geo.haversine_km(latitude, longitude, report.latitude, report.longitude)
+        if distance <= radius_km:
+            nearby_reports.append((distance, report))
     
-    return nearby_reports
\ No newline at end of file
+    nearby_reports.sort(key=lambda entry: entry[0])
+    return [report for _, report in nearby_reports]
@@ -0,0 +1,268 @@
+"""
+Eco-points leaderboard service for WasteWorks.
+The city-wide top list is an index-backed query on User.eco_points. Ranks
+and the weekly leaderboard come from in-memory ranked boards, each rebuilt
+from the database periodically and updated incrementally whenever this
+worker commits an award.
+"""
+
+import bisect
+import threading
+import time
+from datetime import datetime, timedelta
+from app import app, db
+from models import User, Reward
+
+# How long a board may go without a full rebuild from the database. Awards
+# made by other gunicorn workers become visible after at most this long.
+SNAPSHOT_TTL_SECONDS = app.config.get("LEADERBOARD_SNAPSHOT_SECONDS", 300)
+
+def _with_ranks(entries):
+    """Number (user_id, points) entries in descending order; equal points share a rank"""
+    ranked = []
+    for index, (user_id, points) in enumerate(entries):
+        rank = ranked[-1][0] if ranked and ranked[-1][2] == points else index + 1
+        ranked.append((rank, user_id, points))
+    return ranked
+
+class RankedBoard:
+    """
+    Users ordered by points, highest first.
+    Entries are kept in a sorted list of (-points, user_id) so rank lookups
+    are a binary search. Moving a user after an award is a binary search
+    plus a list insert and delete, which shift the entries after it: O(n),
+    but a memmove of pointers that stays in microseconds at city scale.
+    """
+
+    def __init__(self, points_by_user=None):
+        self._lock = threading.Lock()
+        self._points = {}
+        self._entries = []
+        self.built_at = time.monotonic()
+        self.load(points_by_user or {})
+
+    def load(self, points_by_user):
+        """Replace the board with a fresh snapshot of {user_id: points}"""
+        with self._lock:
+            self._points = dict(points_by_user)
+            self._entries = sorted((-points, user_id) for user_id, points in self._points.items())
+            self.built_at = time.monotonic()
+
+    def add_points(self, user_id, points):
+        """Add points to a user's score and move them to their new position"""
+        with self._lock:
+            old_points = self._points.get(user_id)
+            if old_points is not None:
+                index = bisect.bisect_left(self._entries, (-old_points, user_id))
+                del self._entries[index]
+
+            new_points = (old_points or 0) + points
+            self._points[user_id] = new_points
+            bisect.insort(self._entries, (-new_points, user_id))
+
+    def rank(self, user_id):
+        """
+        Get a user's 1-based rank. Users with equal points share a rank.
+
+        Returns:
+            Tuple of (rank, points), or (None, 0) if the user is not on the board
+        """
+        with self._lock:
+            points = self._points.get(user_id)
+            if points is None:
+                return None, 0
+            return bisect.bisect_left(self._entries, (-points,)) + 1, points
+
+    def top(self, limit=10):
+        """Get the top entries as a list of (rank, user_id, points)"""
+        with self._lock:
+            return _with_ranks((user_id, -negative_points) for negative_points, user_id in self._entries[:limit])
+
+    def __len__(self):
+        return len(self._entries)
+
+    def is_stale(self):
+        return time.monotonic() - self.built_at > SNAPSHOT_TTL_SECONDS
+
+
+_city_board = None
+_weekly_board = None
+_weekly_start = None
+_boards_lock = threading.Lock()
+
+def get_week_start(now=None):
+    """
+    Get the start of the weekly leaderboard window (Monday 00:00 UTC).
+
+    Args:
+        now: Reference time (defaults to the current UTC time)
+
+    Returns:
+        Datetime of the start of the week
+    """
+    now = now or datetime.utcnow()
+    return datetime(now.year, now.month, now.day) - timedelta(days=now.weekday())
+
+def _load_city_points():
+    """Load every user's current eco_points balance"""
+    rows = db.session.execute(
+        db.select(User.id, User.eco_points).where(User.eco_points > 0)
+    ).all()
+    return {user_id: points for user_id, points in rows}
+
+def _load_weekly_points(week_start):
+    """Sum each user's reward ledger entries since the start of the week"""
+    rows = db.session.execute(
+        db.select(Reward.user_id, db.func.sum(Reward.points))
+        .where(Reward.created_at >= week_start)
+        .group_by(Reward.user_id)
+    ).all()
+    return {user_id: points for user_id, points in rows if points}
+
+def get_city_board():
+    """
+    Get the city-wide board, rebuilding it if the snapshot has expired.
+
+    Returns:
+        RankedBoard of all users by eco_points
+    """
+    global _city_board
+
+    with _boards_lock:
+        if _city_board is None or _city_board.is_stale():
+            _city_board = RankedBoard(_load_city_points())
+        return _city_board
+
+def get_weekly_board():
+    """
+    Get this week's board, taking a new snapshot when it expires or the week rolls over.
+
+    Returns:
+        RankedBoard of users by points earned this week
+    """
+    global _weekly_board, _weekly_start
+
+    week_start = get_week_start()
+    with _boards_lock:
+        if _weekly_board is None or _weekly_board.is_stale() or _weekly_start != week_start:
+            _weekly_board = RankedBoard(_load_weekly_points(week_start))
+            _weekly_start = week_start
+        return _weekly_board
+
+def get_top_users(limit=10):
+    """
+    Index-backed top-N query straight from the database.
+    Reads the top of the eco_points index, so it includes awards made by
+    every worker without waiting for a board rebuild.
+
+    Args:
+        limit: Number of users to return
+
+    Returns:
+        List of (user_id, username, eco_points) tuples
+    """
+    return db.session.execute(
+        db.select(User.id, User.username, User.eco_points)
+        .where(User.eco_points > 0)
+        .order_by(User.eco_points.desc(), User.id)
+        .limit(limit)
+    ).all()
+
+def get_city_leaderboard(limit=10):
+    """
+    Get the top of the city-wide leaderboard from get_top_users.
+
+    Args:
+        limit: Number of entries to return
+
+    Returns:
+        List of dictionaries with rank, user_id, username and points
+    """
+    top_users = get_top_users(limit)
+    usernames = {user_id: username for user_id, username, _ in top_users}
+    return [
+        {
+            "rank": rank,
+            "user_id": user_id,
+            "username": usernames[user_id],
+            "points": points
+        }
+        for rank, user_id, points in _with_ranks((user_id, points) for user_id, _, points in top_users)
+    ]
+
+def get_leaderboard(board, limit=10):
+    """
+    Get the top of a board with usernames.
+
+    Args:
+        board: RankedBoard to read
+        limit: Number of entries to return
+
+    Returns:
+        List of dictionaries with rank, user_id, username and points
+    """
+    top_entries = board.top(limit)
+    user_ids = [user_id for _, user_id, _ in top_entries]
+    usernames = dict(db.session.execute(
+        db.select(User.id, User.username).where(User.id.in_(user_ids))
+    ).all()) if user_ids else {}
+
+    return [
+        {
+            "rank": rank,
+            "user_id": user_id,
+            "username": usernames.get(user_id, f"User {user_id}"),
+            "points": points
+        }
+        for rank, user_id, points in top_entries
+    ]
+
+def get_user_ranks(user_id):
+    """
+    Get a user's city-wide and weekly ranks.
+
+    Args:
+        user_id: ID of the user
+
+    Returns:
+        Dictionary with city and weekly rank, points and board sizes
+    """
+    city_rank, city_points = get_city_board().rank(user_id)
+    weekly_rank, weekly_points = get_weekly_board().rank(user_id)
+
+    return {
+        "city_rank": city_rank,
+        "city_points": city_points,
+        "city_total": len(get_city_board()),
+        "weekly_rank": weekly_rank,
+        "weekly_points": weekly_points,
+        "weekly_total": len(get_weekly_board())
+    }
+
+def record_award(user_id, points):
+    """
+    Queue an award for the in-memory boards.
+    The boards are only updated once the current transaction commits.
+
+    Args:
+        user_id: ID of the user who was awarded points
+        points: Number of points awarded
+    """
+    db.session.info.setdefault("leaderboard_awards", []).append((user_id, points))
+
+@db.event.listens_for(db.session, "after_commit")
+def _apply_committed_awards(session):
+    awards = session.info.pop("leaderboard_awards", None)
+    if not awards:
+        return
+
+    week_start = get_week_start()
+    for user_id, points in awards:
+        if _city_board is not None:
+            _city_board.add_points(user_id, points)
+        if _weekly_board is not None and _weekly_start == week_start:
+            _weekly_board.add_points(user_id, points)
+
+@db.event.listens_for(db.session, "after_rollback")
+def _discard_rolled_back_awards(session):
+    session.info.pop("leaderboard_awards", None)
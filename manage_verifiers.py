@@ -0,0 +1,81 @@
+"""
+Register and list journey verifiers for signature sealing.
+
+    python manage_verifiers.py add NAME --type recycler
+    python manage_verifiers.py list
+
+'add' generates an Ed25519 key pair, writes the private key to
+VERIFIER_KEY_FOLDER (readable by the owner only) and registers the public
+key. Set BLOCK_SEALING_MODE=signature and BLOCK_SIGNING_VERIFIER=NAME on
+the verifier's deployment to seal new blocks with it.
+"""
+
+import os
+import sys
+import logging
+import argparse
+from app import app, db
+from models import Verifier
+from blockchain_service import get_verifier_key_path
+import signing
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+
+def add_verifier(name, organization_type):
+    if Verifier.query.filter_by(name=name).first():
+        logging.error(f"Verifier {name} already exists.")
+        return 1
+
+    key_path = get_verifier_key_path(name)
+    if os.path.exists(key_path):
+        logging.error(f"Key file {key_path} already exists; refusing to overwrite it.")
+        return 1
+
+    private_key, public_key = signing.generate_key_pair()
+    os.makedirs(os.path.dirname(key_path), mode=0o700, exist_ok=True)
+    fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as key_file:
+        key_file.write(private_key)
+
+    verifier = Verifier(name=name, organization_type=organization_type, public_key=public_key)
+    db.session.add(verifier)
+    db.session.commit()
+
+    logging.info(f"Registered verifier {name} (id {verifier.id}); private key written to {key_path}")
+    return 0
+
+def list_verifiers():
+    for verifier in Verifier.query.order_by(Verifier.id).all():
+        status = 'active' if verifier.is_active else 'inactive'
+        logging.info(
+            f"{verifier.id}: {verifier.name} ({verifier.organization_type or 'unspecified'}, {status}) "
+            f"public key {bytes(verifier.public_key).hex()}"
+        )
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = subparsers.add_parser('add', help='Generate a key pair and register a verifier')
+    add_parser.add_argument('name')
+    add_parser.add_argument('--type', dest='organization_type',
+                            help="Organization type, e.g. 'collection_center' or 'recycler'")
+    subparsers.add_parser('list', help='List registered verifiers')
+    args = parser.parse_args()
+
+    if not signing.is_available():
+        logging.error("The 'cryptography' package is required for signature sealing.")
+        return 1
+
+    with app.app_context():
+        if args.command == 'add':
+            return add_verifier(args.name, args.organization_type)
+        return list_verifiers()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Merkle trees over journey block hashes.
+
+Leaves and interior nodes are hashed with different prefixes so a leaf can
+never be passed off as a node. An odd node at the end of a level is carried
+up unchanged rather than paired with a copy of itself.
+
+This module has no app imports so it can run in worker processes.
+"""
+
+import hashlib
+
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+def hash_leaf(block_hash):
+    """
+    Hash a block hash into a Merkle leaf.
+
+    Args:
+        block_hash: Hex block hash
+
+    Returns:
+        Leaf digest bytes
+    """
+    return hashlib.sha256(LEAF_PREFIX + bytes.fromhex(block_hash)).digest()
+
+def hash_node(left, right):
+    """Hash two child digests into their parent digest"""
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+def _next_level(level):
+    parents = [hash_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        parents.append(level[-1])
+    return parents
+
+def merkle_root(block_hashes):
+    """
+    Compute the Merkle root of a list of block hashes.
+
+    Args:
+        block_hashes: Hex block hashes in leaf order
+
+    Returns:
+        Hex root digest, or None for an empty list
+    """
+    level = [hash_leaf(block_hash) for block_hash in block_hashes]
+    if not level:
+        return None
+    while len(level) > 1:
+        level = _next_level(level)
+    return level[0].hex()
+
+def merkle_levels(block_hashes):
+    """
+    Build every level of the Merkle tree of a list of block hashes.
+
+    Args:
+        block_hashes: Hex block hashes in leaf order
+
+    Returns:
+        List of levels from the leaves up to the root, each a list of
+        digest bytes (empty for an empty list)
+    """
+    level = [hash_leaf(block_hash) for block_hash in block_hashes]
+    if not level:
+        return []
+    levels = [level]
+    while len(level) > 1:
+        level = _next_level(level)
+        levels.append(level)
+    return levels
+
+def sibling_path(index, leaf_count):
+    """
+    Locate the siblings an inclusion proof needs, without the tree itself.
+
+    Args:
+        index: Position of the leaf to prove
+        leaf_count: Number of leaves in the tree
+
+    Returns:
+        List of (level, sibling position, side) tuples from the leaf up to
+        the root, where side says which side the sibling sits on
+    """
+    path = []
+    level, level_size = 0, leaf_count
+    while level_size > 1:
+        sibling = index ^ 1
+        if sibling < level_size:  # An odd last node has no sibling and is carried up
+            path.append((level, sibling, 'left' if sibling < index else 'right'))
+        level += 1
+        level_size = (level_size + 1) // 2
+        index //= 2
+    return path
+
+def inclusion_proof(block_hashes, index):
+    """
+    Build the proof that the leaf at `index` is part of the tree.
+
+    Args:
+        block_hashes: Hex block hashes in leaf order
+        index: Position of the leaf to prove
+
+    Returns:
+        List of {'hash', 'position'} sibling steps from the leaf up to the root,
+        where position says which side the sibling sits on
+    """
+    levels = merkle_levels(block_hashes)
+    return [
+        {'hash': levels[level][sibling].hex(), 'position': side}
+        for level, sibling, side in sibling_path(index, len(block_hashes))
+    ]
+
+def verify_proof(block_hash, proof, root):
+    """
+    Check an inclusion proof against a Merkle root.
+
+    Args:
+        block_hash: Hex block hash being proved
+        proof: Steps returned by inclusion_proof
+        root: Hex Merkle root
+
+    Returns:
+        True if the proof leads from the block hash to the root
+    """
+    digest = hash_leaf(block_hash)
+    for step in proof:
+        sibling = bytes.fromhex(step['hash'])
+        if step['position'] == 'left':
+            digest = hash_node(sibling, digest)
+        else:
+            digest = hash_node(digest, sibling)
+    return digest.hex() == root
@@ -0,0 +1,88 @@
+"""
+Proof-of-work mining engine for waste journey blocks.
+
+Only the nonce changes between attempts, so the miner hashes the fixed
+part of the block once and, for each attempt, copies that hash state and
+feeds it just the nonce.
+
+Blocks are hashed over their canonical binary encoding (see block_codec),
+where the nonce is the final 8 bytes. Legacy blocks were hashed over
+json.dumps(sort_keys=True) of their fields; hash_block_data reproduces
+that format for verification.
+
+This module has no app imports so it can run in worker processes.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from block_codec import encode_nonce
+
+def mine_prefix(prefix, difficulty, start_nonce=0):
+    """
+    Mine a binary-encoded block (picklable entry point for process pools).
+
+    Args:
+        prefix: Encoded block bytes before the nonce
+        difficulty: Number of leading '0' hex digits required
+        start_nonce: First nonce to try
+
+    Returns:
+        Tuple of (nonce, hex hash)
+    """
+    zero_bytes, half_byte = divmod(difficulty, 2)
+    zero_prefix = bytes(zero_bytes)
+    prefix_state = hashlib.sha256(prefix)
+
+    nonce = start_nonce
+    while True:
+        state = prefix_state.copy()
+        state.update(encode_nonce(nonce))
+        digest = state.digest()
+        if digest.startswith(zero_prefix) and (not half_byte or digest[zero_bytes] < 0x10):
+            return nonce, digest.hex()
+        nonce += 1
+
+def hash_block_data(block_data):
+    """
+    Legacy block hash: SHA-256 of the sorted-key JSON of the block data.
+
+    Args:
+        block_data: Dictionary of block fields including the nonce
+
+    Returns:
+        Hex digest string
+    """
+    block_string = json.dumps(block_data, sort_keys=True)
+    return hashlib.sha256(block_string.encode()).hexdigest()
+
+# Size of the mining process pool (defaults to the CPU count)
+MINING_WORKERS = int(os.environ.get("BLOCK_MINING_WORKERS", 0)) or os.cpu_count() or 1
+
+_executor = None
+
+def get_executor():
+    """Get the shared process pool used for batch mining (MINING_WORKERS processes)"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=MINING_WORKERS)
+    return _executor
+
+def mine_many(prefixes, difficulty, parallel=False):
+    """
+    Mine several independent binary-encoded blocks, optionally spread across the process pool.
+
+    Args:
+        prefixes: List of encoded block bytes before the nonce
+        difficulty: Number of leading '0' hex digits required
+        parallel: Use the process pool (ignored for a single block)
+
+    Returns:
+        List of (nonce, hex hash) tuples in the same order
+    """
+    if not parallel or len(prefixes) < 2:
+        return [mine_prefix(prefix, difficulty) for prefix in prefixes]
+
+    chunksize = max(1, len(prefixes) // (MINING_WORKERS * 4))
+    return list(get_executor().map(mine_prefix, prefixes, [difficulty] * len(prefixes), chunksize=chunksize))
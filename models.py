@@ -1,8 +1,13 @@
 from datetime import datetime
-import hashlib
-import json
-from app import db, bcrypt
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.hybrid import hybrid_property
+from app import app, db, bcrypt
 from flask_login import UserMixin
+from mining import hash_block_data, mine_prefix
+from chain_verify import verify_block, verify_seal
+import block_codec
+import geo
+import signing
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -14,7 +19,7 @@ class User(UserMixin, db.Model):
     
     # User status and scores
     is_active = db.Column(db.Boolean, default=True)
-    eco_points = db.Column(db.Integer, default=0)
+    eco_points = db.Column(db.Integer, default=0, index=True)
     recycling_streak = db.Column(db.Integer, default=0)
     last_activity_date = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -29,8 +34,10 @@ class User(UserMixin, db.Model):
     def check_password(self, password):
         return bcrypt.check_password_hash(self.password_hash, password)
     
-    def award_points(self, points):
-        self.eco_points += points
+    def award_points(self, points, description="Points awarded", reward_type="manual"):
+        """Record points in the reward ledger and atomically add them to the balance"""
+        from rewards import award_points
+        award_points(self.id, points, description, reward_type)
         db.session.commit()
     
     def __repr__(self):
@@ -43,20 +50,25 @@ class WasteItem(db.Model):
     is_recyclable = db.Column(db.Boolean, default=False)
     is_ewaste = db.Column(db.Boolean, default=False)
     material = db.Column(db.String(100))
-    full_analysis = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # User relationship
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     
-    # Additional analysis fields
-    summary = db.Column(db.Text)
-    recycling_instructions = db.Column(db.Text)
-    environmental_impact = db.Column(db.Text)
-    disposal_recommendations = db.Column(db.Text)
-    
-    # Material detection results (stored as JSON string)
-    _material_detection = db.Column('material_detection', db.Text, nullable=True)
+    # Heavy analysis text, deferred by default and loaded together on first access.
+    # Detail pages should load them with WASTE_ITEM_DETAIL_OPTIONS.
+    full_analysis = db.deferred(db.Column(db.Text), group='analysis')
+    summary = db.deferred(db.Column(db.Text), group='analysis')
+    recycling_instructions = db.deferred(db.Column(db.Text), group='analysis')
+    environmental_impact = db.deferred(db.Column(db.Text), group='analysis')
+    disposal_recommendations = db.deferred(db.Column(db.Text), group='analysis')
+    
+    # Material detection results (JSONB on PostgreSQL, JSON1 text on SQLite).
+    # The value is decoded once when the row is loaded and kept on the instance.
+    material_detection = db.deferred(
+        db.Column(db.JSON().with_variant(JSONB(), 'postgresql'), nullable=True),
+        group='detection'
+    )
     
     # Fields for marketplace listings
     is_listed = db.Column(db.Boolean, default=False)
@@ -79,25 +91,43 @@ class WasteItem(db.Model):
     recycling_completed = db.Column(db.Boolean, default=False)
     recycling_completion_date = db.Column(db.DateTime, nullable=True)
     
-    @property
-    def material_detection(self):
-        """Getter: Deserialize JSON string to Python dictionary"""
-        if self._material_detection:
-            return json.loads(self._material_detection)
-        return None
-    
-    @material_detection.setter
-    def material_detection(self, value):
-        """Setter: Serialize Python dictionary to JSON string"""
-        if value is not None:
-            self._material_detection = json.dumps(value)
-        else:
-            self._material_detection = None
+    # Journey chain head, kept in step with the blocks by blockchain_service
+    # (under a row lock) so appends and list pages need no block queries
+    head_block_hash = db.Column(db.String(64), nullable=True)
+    current_stage = db.Column(db.String(50), nullable=True)
+    blocks_count = db.Column(db.Integer, default=0)
+    
+    @hybrid_property
+    def primary_material(self):
+        """Primary material from material detection, filterable in queries"""
+        return (self.material_detection or {}).get('primary_material')
+    
+    @primary_material.expression
+    def primary_material(cls):
+        return cls.material_detection['primary_material'].as_string()
+    
+    @hybrid_property
+    def recyclability_score(self):
+        """Recyclability score from material detection, filterable in queries"""
+        return (self.material_detection or {}).get('recyclability_score')
+    
+    @recyclability_score.expression
+    def recyclability_score(cls):
+        return cls.material_detection['recyclability_score'].as_float()
 
     def __repr__(self):
         return f"<WasteItem {self.id}: {'Recyclable' if self.is_recyclable else 'Non-Recyclable'}>"
 
 
+# Expression indexes so material detection fields can be filtered server-side
+db.Index('ix_waste_item_primary_material', WasteItem.primary_material)
+db.Index('ix_waste_item_recyclability_score', WasteItem.recyclability_score)
+
+# Keyset pagination indexes for the marketplace and municipality lists
+db.Index('ix_waste_item_listed_created', WasteItem.is_listed, WasteItem.created_at, WasteItem.id)
+db.Index('ix_waste_item_municipality_created', WasteItem.sent_to_municipality, WasteItem.created_at, WasteItem.id)
+
+
 class DropLocation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -142,17 +172,35 @@ class UserAchievement(db.Model):
 
 
 class Reward(db.Model):
+    # Append-only ledger: User.eco_points must always equal the sum of a user's rewards
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     points = db.Column(db.Integer, default=0)
     description = db.Column(db.String(255), nullable=False)
-    reward_type = db.Column(db.String(50), nullable=False)  # 'drop_off', 'listing', 'achievement'
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    reward_type = db.Column(db.String(50), nullable=False)  # 'drop_off', 'listing', 'achievement', 'municipality', 'infrastructure', 'adjustment'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     def __repr__(self):
         return f"<Reward {self.id}: {self.points} points for {self.reward_type}>"
 
 
+class Verifier(db.Model):
+    """
+    An organization that seals journey stages with its own signing key,
+    such as a collection center or recycler. Only the public key is stored;
+    the private key stays on the verifier's machine.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    organization_type = db.Column(db.String(50))  # 'collection_center', 'recycler', 'municipality'
+    public_key = db.Column(db.LargeBinary, nullable=False)  # Raw 32-byte Ed25519 public key
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Verifier {self.name}>"
+
+
 class WasteJourneyBlock(db.Model):
     """
     A block in the blockchain-like waste tracking system.
@@ -173,6 +221,15 @@ class WasteJourneyBlock(db.Model):
     block_hash = db.Column(db.String(64), nullable=False)  # Hash of this block
     nonce = db.Column(db.Integer, default=0)  # For proof of work simulation
     
+    # Exact bytes the hash was computed over and their encoding version
+    # (see block_codec); legacy JSON-hashed blocks have no hash_version
+    hash_version = db.Column(db.Integer, nullable=True)
+    encoded_data = db.Column(db.LargeBinary, nullable=True)
+    
+    # Ed25519 seal over encoded_data, for blocks sealed by signature instead of mining
+    verifier_id = db.Column(db.Integer, db.ForeignKey('verifier.id'), nullable=True)
+    signature = db.Column(db.LargeBinary, nullable=True)
+    
     # Relationships
     waste_item = db.relationship('WasteItem', backref='journey_blocks', lazy=True)
     
@@ -185,14 +242,20 @@ class WasteJourneyBlock(db.Model):
         self.previous_hash = previous_hash
         self.nonce = 0
         
+        # Set the timestamp here rather than through the column default so
+        # it is part of the hashed data
+        self.timestamp = datetime.utcnow()
+        
         # Calculate block hash on creation
-        self.block_hash = self.calculate_hash()
+        self.hash_version = block_codec.ENCODING_VERSION
+        self.encoded_data = self.encode()
+        self.block_hash = block_codec.hash_encoded(self.encoded_data)
     
-    def calculate_hash(self):
-        """Calculate the hash of this block based on its contents"""
-        block_data = {
+    def get_fields(self):
+        """Get the block fields covered by the block hash"""
+        return {
             'waste_item_id': self.waste_item_id,
-            'timestamp': str(self.timestamp),
+            'timestamp': self.timestamp,
             'stage': self.stage,
             'location': self.location,
             'details': self.details,
@@ -200,29 +263,185 @@ class WasteJourneyBlock(db.Model):
             'previous_hash': self.previous_hash,
             'nonce': self.nonce
         }
-        
-        # Convert the data to a JSON string and hash it
-        block_string = json.dumps(block_data, sort_keys=True)
-        return hashlib.sha256(block_string.encode()).hexdigest()
+    
+    def get_hash_data(self):
+        """Get the block fields as hashed by legacy (JSON-hashed) blocks"""
+        return dict(self.get_fields(), timestamp=str(self.timestamp))
+    
+    def encode_prefix(self):
+        """Canonical encoding of every field except the nonce"""
+        return block_codec.encode_block_prefix(
+            self.waste_item_id, self.timestamp, self.stage, self.location,
+            self.details, self.verified_by, self.previous_hash
+        )
+    
+    def encode(self):
+        """Canonical binary encoding of the block"""
+        return self.encode_prefix() + block_codec.encode_nonce(self.nonce or 0)
+    
+    def calculate_hash(self):
+        """Calculate the hash of this block based on its contents"""
+        if self.hash_version:
+            return block_codec.hash_encoded(self.encode())
+        return hash_block_data(self.get_hash_data())
+    
+    def set_mining_result(self, nonce, block_hash):
+        """Store a mined nonce and hash along with the bytes that were hashed"""
+        self.nonce = nonce
+        self.block_hash = block_hash
+        self.encoded_data = self.encode()
+        return self.block_hash
     
     def mine_block(self, difficulty=2):
         """Simulate proof of work by finding a hash with leading zeros"""
-        target = '0' * difficulty
-        
-        while self.block_hash[:difficulty] != target:
-            self.nonce += 1
-            self.block_hash = self.calculate_hash()
+        return self.set_mining_result(*mine_prefix(self.encode_prefix(), difficulty, self.nonce or 0))
+    
+    def seal(self, verifier_id, private_key):
+        """
+        Seal the block with a verifier's signature instead of proof of work.
         
+        Args:
+            verifier_id: ID of the signing Verifier
+            private_key: The verifier's loaded Ed25519 private key
+        """
+        self.nonce = 0
+        self.encoded_data = self.encode()
+        self.block_hash = block_codec.hash_encoded(self.encoded_data)
+        self.verifier_id = verifier_id
+        self.signature = signing.sign(private_key, self.encoded_data)
         return self.block_hash
     
-    def is_valid(self):
-        """Verify that the block's hash is valid"""
-        return self.block_hash == self.calculate_hash()
+    def is_valid(self, signature_verifier=None, difficulty=None):
+        """
+        Verify that the block's hash is valid and that it was sealed.
+        For encoded blocks this is one SHA-256 over the stored bytes plus a
+        check that those bytes still match the block's fields. The block must
+        also be signed by a registered verifier or meet the mining difficulty.
+        
+        Args:
+            signature_verifier: SignatureVerifier to reuse across blocks (the
+                block's own verifier key is loaded if omitted)
+            difficulty: Leading '0' hex digits required of a mined block
+                (defaults to BLOCK_VERIFY_DIFFICULTY)
+        """
+        if not verify_block(self.get_fields(), self.block_hash, self.hash_version, self.encoded_data):
+            return False
+        
+        if difficulty is None:
+            difficulty = app.config["BLOCK_VERIFY_DIFFICULTY"]
+        if signature_verifier is None and self.verifier_id is not None:
+            verifier = db.session.get(Verifier, self.verifier_id)
+            signature_verifier = signing.SignatureVerifier(
+                {verifier.id: bytes(verifier.public_key)} if verifier else {}
+            )
+        return verify_seal(self.block_hash, self.verifier_id, self.encoded_data, self.signature,
+                           difficulty, signature_verifier) is None
     
     def __repr__(self):
         return f"<WasteJourneyBlock {self.id}: {self.stage} for waste_item_id={self.waste_item_id}>"
 
 
+class JourneyCheckpoint(db.Model):
+    """
+    Merkle checkpoint over a contiguous range of journey blocks.
+    Each checkpoint covers the blocks added since the previous one and is
+    chained to it through previous_root.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Blocks covered, by block id (inclusive)
+    first_block_id = db.Column(db.Integer, nullable=False)
+    last_block_id = db.Column(db.Integer, nullable=False, index=True)
+    block_count = db.Column(db.Integer, nullable=False)
+
+    # Merkle root of the covered block hashes, and the previous checkpoint's root
+    merkle_root = db.Column(db.String(64), nullable=False)
+    previous_root = db.Column(db.String(64), nullable=True)
+
+    # Blocks in the range whose stored hash did not match their contents, or
+    # that were neither signed by a registered verifier nor mined
+    invalid_blocks = db.Column(db.Integer, default=0)
+
+    def __repr__(self):
+        return f"<JourneyCheckpoint {self.id}: blocks {self.first_block_id}-{self.last_block_id}>"
+
+
+class JourneyCheckpointNode(db.Model):
+    """
+    One node of a checkpoint's Merkle tree.
+    Stored when the checkpoint is created, so an inclusion proof reads only
+    the nodes on its sibling path instead of rebuilding the tree.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    checkpoint_id = db.Column(db.Integer, db.ForeignKey('journey_checkpoint.id'), nullable=False)
+
+    # Level 0 holds the leaves; position counts from the left within a level
+    level = db.Column(db.Integer, nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    digest = db.Column(db.String(64), nullable=False)
+
+    # Journey block of a leaf (None for interior nodes)
+    block_id = db.Column(db.Integer, nullable=True, index=True)
+
+    def __repr__(self):
+        return f"<JourneyCheckpointNode {self.checkpoint_id}: level {self.level}, position {self.position}>"
+
+
+db.Index('ix_journey_checkpoint_node_position', JourneyCheckpointNode.checkpoint_id,
+         JourneyCheckpointNode.level, JourneyCheckpointNode.position, unique=True)
+
+
+# Chain order lookups: appends, journey pages and the chain auditor
+db.Index('ix_waste_journey_block_item_chain', WasteJourneyBlock.waste_item_id,
+         WasteJourneyBlock.timestamp, WasteJourneyBlock.id)
+
+
+class ChainAuditRun(db.Model):
+    """
+    One run of the background chain-integrity auditor.
+    Progress is saved after every batch so an interrupted run can resume
+    from last_waste_item_id.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    status = db.Column(db.String(20), default='running')  # 'running', 'completed', 'failed'
+
+    # Resume point: every item up to and including this id has been audited
+    last_waste_item_id = db.Column(db.Integer, default=0)
+
+    # Progress and throughput
+    items_scanned = db.Column(db.Integer, default=0)
+    blocks_scanned = db.Column(db.Integer, default=0)
+    broken_chains = db.Column(db.Integer, default=0)
+    elapsed_seconds = db.Column(db.Float, default=0)
+
+    # Relationships
+    problems = db.relationship('BrokenChain', backref='run', lazy=True)
+
+    @property
+    def blocks_per_second(self):
+        return self.blocks_scanned / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def __repr__(self):
+        return f"<ChainAuditRun {self.id}: {self.status}, {self.blocks_scanned} blocks>"
+
+
+class BrokenChain(db.Model):
+    """A journey block that failed verification during a chain audit"""
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('chain_audit_run.id'), nullable=False, index=True)
+    waste_item_id = db.Column(db.Integer, db.ForeignKey('waste_item.id'), nullable=False, index=True)
+    block_id = db.Column(db.Integer, nullable=False)
+    problem = db.Column(db.String(50), nullable=False)  # 'hash_mismatch', 'broken_link', 'bad_signature', 'insufficient_work'
+    detected_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<BrokenChain item={self.waste_item_id} block={self.block_id}: {self.problem}>"
+
+
 class InfrastructureReport(db.Model):
     """
     Reports of damaged infrastructure submitted by users through webcam photos.
@@ -241,8 +460,12 @@ class InfrastructureReport(db.Model):
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
     
+    # Geohash of the coordinates, kept in step by set_report_geohash; nearby
+    # and bounding-box queries scan prefix ranges of its index
+    geohash = db.Column(db.String(12), nullable=True, index=True)
+    
     # Image and timestamps
-    image_path = db.Column(db.String(255), nullable=False)
+    image_path = db.Column(db.String(255), nullable=True)  # None when no photo was submitted
     reported_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Status tracking
@@ -255,3 +478,52 @@ class InfrastructureReport(db.Model):
     
     def __repr__(self):
         return f"<InfrastructureReport {self.id}: {self.title} ({self.status})>"
+
+
+class InfrastructureCluster(db.Model):
+    """
+    Running count of geotagged infrastructure reports per geohash cell, kept
+    for every cluster precision and every category/status/severity
+    combination so the map can show filtered clusters without reading reports.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    precision = db.Column(db.Integer, nullable=False)  # Geohash length of the cell
+    cell = db.Column(db.String(12), nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    severity = db.Column(db.String(20), nullable=False)
+    report_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Coordinate sums, so the cluster's centroid is sum / report_count
+    latitude_sum = db.Column(db.Float, nullable=False, default=0.0)
+    longitude_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<InfrastructureCluster {self.cell}: {self.report_count} {self.category}/{self.status}/{self.severity}>"
+
+# One row per cell and filter combination; also serves the map's cell range scans
+db.Index('ix_infrastructure_cluster_cell', InfrastructureCluster.precision, InfrastructureCluster.cell,
+         InfrastructureCluster.category, InfrastructureCluster.status, InfrastructureCluster.severity,
+         unique=True)
+
+
+@db.event.listens_for(InfrastructureReport, "before_insert")
+@db.event.listens_for(InfrastructureReport, "before_update")
+def set_report_geohash(mapper, connection, target):
+    # Reports created or moved through the ORM
+    if target.latitude is None or target.longitude is None:
+        target.geohash = None
+    else:
+        target.geohash = geo.encode_geohash(target.latitude, target.longitude)
+
+
+# Loader options for the deferred column groups
+WASTE_ITEM_DETAIL_OPTIONS = (db.undefer_group('analysis'), db.undefer_group('detection'))
+
+# Columns shown on marketplace and municipality list cards
+WASTE_ITEM_CARD_OPTIONS = (db.load_only(
+    WasteItem.id, WasteItem.image_path, WasteItem.title, WasteItem.description,
+    WasteItem.material, WasteItem.is_recyclable, WasteItem.is_ewaste,
+    WasteItem.location, WasteItem.created_at, WasteItem.sent_to_municipality,
+    WasteItem.municipality_status, WasteItem.current_stage, WasteItem.blocks_count
+),)
@@ -0,0 +1,102 @@
+"""
+Keyset (cursor) pagination for WasteWorks list views.
+Pages are ordered newest first by (created_at, id), so fetching any page
+is an index range scan no matter how deep the user has scrolled.
+"""
+
+import base64
+from datetime import datetime
+from flask import current_app
+from app import db
+
+# Hard upper bound for the page_size query parameter
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(created_at, item_id):
+    """
+    Encode the position of the last row on a page as an opaque cursor.
+    
+    Args:
+        created_at: Creation timestamp of the last row
+        item_id: ID of the last row
+        
+    Returns:
+        URL-safe cursor string
+    """
+    raw = f"{created_at.isoformat()}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor created by encode_cursor.
+    
+    Args:
+        cursor: Cursor string from the client
+        
+    Returns:
+        Tuple of (created_at, item_id), or None if the cursor is missing or invalid
+    """
+    if not cursor:
+        return None
+    
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, item_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def get_page_size(requested=None):
+    """
+    Resolve the page size from a request parameter and the app default.
+    
+    Args:
+        requested: Page size requested by the client (optional)
+        
+    Returns:
+        Page size between 1 and MAX_PAGE_SIZE
+    """
+    default = current_app.config.get("LISTING_PAGE_SIZE", 24)
+    
+    try:
+        page_size = int(requested) if requested else default
+    except (TypeError, ValueError):
+        page_size = default
+    
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+def keyset_page(query, model, cursor=None, page_size=None):
+    """
+    Fetch one page of a query ordered newest first.
+    
+    Args:
+        query: Filtered query of the model (without ordering)
+        model: Model class with created_at and id columns
+        cursor: Cursor of the previous page's last row (optional)
+        page_size: Number of rows per page (optional)
+        
+    Returns:
+        Tuple of (list of rows, cursor for the next page or None)
+    """
+    page_size = page_size or get_page_size()
+    position = decode_cursor(cursor)
+    
+    # Rows without a creation time have no position in the order (update_db backfills them)
+    query = query.filter(model.created_at.isnot(None))
+    
+    if position:
+        created_at, item_id = position
+        query = query.filter(db.or_(
+            model.created_at < created_at,
+            db.and_(model.created_at == created_at, model.id < item_id)
+        ))
+    
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(page_size + 1).all()
+    
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    
+    return rows, next_cursor
@@ -0,0 +1,100 @@
+"""
+QR code image service for WasteWorks.
+Renders the verification QR code of a waste item as PNG or SVG on the
+server and caches the result on disk. The encoded URL is built from the
+configured PUBLIC_BASE_URL, never from the request, so a cached image is
+keyed by the item and format only: it is rendered once and then served
+straight from disk for printed labels and repeat scans.
+
+Changing PUBLIC_BASE_URL requires clearing QR_CACHE_FOLDER.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+from flask import url_for
+from app import app
+
+try:
+    import qrcode
+    import qrcode.image.svg
+except ImportError:  # Optional: the tracking page falls back to client-side rendering
+    qrcode = None
+
+QR_IMAGE_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml'
+}
+
+# Pixels per QR module in PNG output, and the quiet zone in modules
+QR_BOX_SIZE = 8
+QR_BORDER = 2
+
+def is_available():
+    """Return True if the qrcode package is installed and a public base URL is configured"""
+    return qrcode is not None and bool(app.config.get("PUBLIC_BASE_URL"))
+
+def get_verification_url(waste_item_id):
+    """
+    Get the absolute public verification URL of a waste item.
+
+    Args:
+        waste_item_id: ID of the waste item
+
+    Returns:
+        URL under the configured PUBLIC_BASE_URL
+    """
+    return app.config["PUBLIC_BASE_URL"].rstrip('/') + url_for('verify_waste', item_id=waste_item_id)
+
+def get_qr_etag(waste_item_id, image_format='png'):
+    """
+    Get the strong ETag of a waste item's QR image.
+
+    Args:
+        waste_item_id: ID of the waste item
+        image_format: 'png' or 'svg'
+
+    Returns:
+        ETag string (without quotes)
+    """
+    # The base URL is configuration, so this only changes when the deployment moves
+    base_digest = hashlib.sha256(app.config["PUBLIC_BASE_URL"].encode()).hexdigest()[:12]
+    return f"{waste_item_id}-{base_digest}-{image_format}"
+
+def _render(url, image_format):
+    qr = qrcode.QRCode(
+        error_correction=qrcode.constants.ERROR_CORRECT_H,
+        box_size=QR_BOX_SIZE,
+        border=QR_BORDER
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+
+    buffer = io.BytesIO()
+    if image_format == 'svg':
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        qr.make_image(fill_color='black', back_color='white').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def get_qr_image_path(waste_item_id, image_format='png'):
+    """
+    Get the cached QR image file for a waste item, rendering it if needed.
+
+    Args:
+        waste_item_id: ID of the waste item
+        image_format: 'png' or 'svg'
+
+    Returns:
+        Path of the image file
+    """
+    path = os.path.join(app.config["QR_CACHE_FOLDER"], f"{waste_item_id}.{image_format}")
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(app.config["QR_CACHE_FOLDER"], exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=app.config["QR_CACHE_FOLDER"], suffix='.tmp', delete=False) as image_file:
+        image_file.write(_render(get_verification_url(waste_item_id), image_format))
+    os.replace(image_file.name, path)  # Atomic, so concurrent workers never serve a partial file
+    return path
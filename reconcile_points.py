@@ -0,0 +1,46 @@
+"""
+Verify every user's eco_points balance against the Reward ledger.
+Run with --fix to reset mismatched balances to their ledger sums.
+"""
+
+import sys
+import logging
+import argparse
+from app import app
+from rewards import reconcile_eco_points
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fix', action='store_true',
+                        help='Reset mismatched balances to their ledger sums')
+    args = parser.parse_args()
+    
+    with app.app_context():
+        mismatches = reconcile_eco_points(fix=args.fix)
+    
+    for mismatch in mismatches:
+        logging.warning(
+            f"User {mismatch['user_id']} ({mismatch['username']}): "
+            f"balance {mismatch['eco_points']}, ledger {mismatch['ledger_points']}, "
+            f"difference {mismatch['difference']}"
+        )
+    
+    if not mismatches:
+        logging.info("All eco_points balances match the reward ledger.")
+        return 0
+    
+    if args.fix:
+        logging.info(f"Reset {len(mismatches)} balance(s) to the reward ledger.")
+        return 0
+    
+    logging.error(f"{len(mismatches)} user balance(s) do not match the reward ledger.")
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
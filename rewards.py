@@ -1,11 +1,18 @@
 """
 Rewards and gamification system for WasteWorks.
+
+Reward functions only add their changes to the current database session.
+The calling route commits once, so a request's points, streak, reward and
+achievement changes are written in a single transaction.
 """
 
+import logging
 from datetime import datetime, timedelta
 from flask_login import current_user
 from app import db
 from models import User, WasteItem, Achievement, UserAchievement, Reward, DropLocation
+import leaderboard_service
+import user_cache
 
 def award_points(user_id, points, description, reward_type):
     """
@@ -24,28 +31,59 @@ def award_points(user_id, points, description, reward_type):
     if not user:
         return None
         
-    # Create a reward record
+    reward = _record_reward(user, points, description, reward_type)
+    
+    # Check for new achievements
+    check_achievements(user_id)
+    
+    return reward
+
+def _record_reward(user, points, description, reward_type):
+    """
+    Add a reward record and its points to the session without committing
+    
+    Args:
+        user: User model instance
+        points: Number of points to award
+        description: Description of why points were awarded
+        reward_type: Type of reward (drop_off, listing, achievement)
+    """
     reward = Reward(
-        user_id=user_id,
+        user_id=user.id,
         points=points,
         description=description,
         reward_type=reward_type
     )
     
-    # Add points to user
-    user.eco_points += points
+    db.session.add(reward)
+    
+    # Add points to user with a server-side increment so concurrent awards
+    # from other workers are never lost
+    _increment_eco_points(user.id, points)
+    leaderboard_service.record_award(user.id, points)
     
     # Update streak if applicable
     _update_recycling_streak(user)
     
-    # Save changes
-    db.session.add(reward)
-    db.session.commit()
+    return reward
+
+def _increment_eco_points(user_id, points):
+    """
+    Atomically add points to a user's balance
     
-    # Check for new achievements
-    check_achievements(user_id)
+    Args:
+        user_id: ID of the user
+        points: Number of points to add
+    """
+    db.session.execute(
+        db.update(User)
+        .where(User.id == user_id)
+        .values(eco_points=db.func.coalesce(User.eco_points, 0) + points)
+        .execution_options(synchronize_session="fetch")
+    )
     
-    return reward
+    # Bulk UPDATEs skip ORM events, so drop the cached session user explicitly
+    user_cache.invalidate_user(user_id)
 
 def award_points_for_drop_off(user_id, waste_item_id, drop_location_id):
     """
@@ -105,10 +143,105 @@ def award_points_for_listing(user_id, waste_item_id):
     
     return award_points(user_id, points, description, "listing")
 
+# In-memory copy of the achievement catalog. Achievements are seeded once by
+# recreate_db.py and practically never change, so there is no reason to load
+# them from the database on every award.
+_achievement_catalog = None
+
+def get_achievement_catalog(refresh=False):
+    """
+    Get the cached achievement catalog
+    
+    Args:
+        refresh: Reload the catalog from the database
+        
+    Returns:
+        List of dictionaries describing each achievement
+    """
+    global _achievement_catalog
+    
+    if _achievement_catalog is None or refresh:
+        _achievement_catalog = [
+            {
+                "id": achievement.id,
+                "name": achievement.name,
+                "points_awarded": achievement.points_awarded or 0,
+                "required_items": achievement.required_items or 0,
+                "required_material": achievement.required_material
+            }
+            for achievement in Achievement.query.order_by(Achievement.id).all()
+        ]
+    
+    return _achievement_catalog
+
+def invalidate_achievement_catalog():
+    """Drop the cached achievement catalog so the next check reloads it"""
+    global _achievement_catalog
+    _achievement_catalog = None
+
+def _get_achievement_snapshot(user):
+    """
+    Load everything needed to evaluate achievement rules for a user
+    
+    Args:
+        user: User model instance
+        
+    Returns:
+        Tuple of (set of earned achievement IDs, dictionary of item counts)
+    """
+    earned_ids = set(db.session.execute(
+        db.select(UserAchievement.achievement_id).filter_by(user_id=user.id)
+    ).scalars())
+    
+    def count_where(condition):
+        return db.func.coalesce(db.func.sum(db.case((condition, 1), else_=0)), 0)
+    
+    counts = db.session.execute(
+        db.select(
+            count_where(WasteItem.is_recyclable == True).label("recyclable_items"),
+            count_where(WasteItem.material == "Plastic").label("plastic_items"),
+            count_where(WasteItem.is_ewaste == True).label("ewaste_items"),
+            count_where(WasteItem.is_listed == True).label("listed_items")
+        ).filter(WasteItem.user_id == user.id)
+    ).one()._asdict()
+    
+    counts["recycling_streak"] = user.recycling_streak or 0
+    return earned_ids, counts
+
+# Achievement rules keyed by achievement name. Each rule receives the cached
+# achievement dictionary and the user's counts snapshot.
+ACHIEVEMENT_RULES = {
+    # Recycle Rookie (first recycled item)
+    "Recycle Rookie": lambda achievement, counts: (
+        achievement["required_items"] == 1 and counts["recyclable_items"] >= 1
+    ),
+    # Plastic Hero (5 plastic items)
+    "Plastic Hero": lambda achievement, counts: (
+        achievement["required_material"] == "Plastic"
+        and counts["plastic_items"] >= achievement["required_items"]
+    ),
+    # E-Waste Warrior (3 e-waste items)
+    "E-Waste Warrior": lambda achievement, counts: (
+        achievement["required_material"] == "Electronic"
+        and counts["ewaste_items"] >= achievement["required_items"]
+    ),
+    # Marketplace Maven (3 listings)
+    "Marketplace Maven": lambda achievement, counts: (
+        counts["listed_items"] >= achievement["required_items"]
+    ),
+    # Community Champion (7-day streak)
+    "Community Champion": lambda achievement, counts: (
+        counts["recycling_streak"] >= 7
+    )
+}
+
 def check_achievements(user_id):
     """
     Check and award any achievements the user has earned
     
+    All rules are evaluated in one pass against a single snapshot of the
+    user's earned achievements and item counts.
+    
     Args:
         user_id: ID of the user to check achievements for
     """
@@ -119,82 +252,33 @@ def check_achievements(user_id):
     if not user:
         return None
     
-    # Get all available achievements
-    achievements = Achievement.query.all()
+    earned_ids, counts = _get_achievement_snapshot(user)
     earned_achievements = []
     
-    for achievement in achievements:
+    for achievement in get_achievement_catalog():
         # Skip if user already has this achievement
-        existing = UserAchievement.query.filter_by(
-            user_id=user_id, 
-            achievement_id=achievement.id
-        ).first()
-        
-        if existing:
+        if achievement["id"] in earned_ids:
             continue
         
-        # Check if user meets criteria for achievement
-        is_earned = False
-        
-        # Achievement: Recycle Rookie (first recycled item)
-        if achievement.name == "Recycle Rookie" and achievement.required_items == 1:
-            item_count = WasteItem.query.filter_by(
-                user_id=user_id,
-                is_recyclable=True
-            ).count()
-            
-            is_earned = item_count >= 1
-        
-        # Achievement: Plastic Hero (5 plastic items)
-        elif achievement.name == "Plastic Hero" and achievement.required_material == "Plastic":
-            plastic_items = WasteItem.query.filter_by(
-                user_id=user_id,
-                material="Plastic"
-            ).count()
-            
-            is_earned = plastic_items >= achievement.required_items
-        
-        # Achievement: E-Waste Warrior (3 e-waste items)
-        elif achievement.name == "E-Waste Warrior" and achievement.required_material == "Electronic":
-            ewaste_items = WasteItem.query.filter_by(
-                user_id=user_id,
-                is_ewaste=True
-            ).count()
-            
-            is_earned = ewaste_items >= achievement.required_items
-        
-        # Achievement: Marketplace Maven (3 listings)
-        elif achievement.name == "Marketplace Maven":
-            listings = WasteItem.query.filter_by(
-                user_id=user_id,
-                is_listed=True
-            ).count()
-            
-            is_earned = listings >= achievement.required_items
+        rule = ACHIEVEMENT_RULES.get(achievement["name"])
+        if not rule or not rule(achievement, counts):
+            continue
         
-        # Achievement: Community Champion (7-day streak)
-        elif achievement.name == "Community Champion":
-            is_earned = user.recycling_streak >= 7
+        db.session.add(UserAchievement(
+            user_id=user_id,
+            achievement_id=achievement["id"]
+        ))
+        earned_ids.add(achievement["id"])
+        earned_achievements.append(achievement)
         
-        # Award the achievement if earned
-        if is_earned:
-            user_achievement = UserAchievement(
-                user_id=user_id,
-                achievement_id=achievement.id
-            )
-            
-            db.session.add(user_achievement)
-            earned_achievements.append(achievement)
-            
-            # Award points for the achievement
-            award_points(
-                user_id,
-                achievement.points_awarded,
-                f"Earned achievement: {achievement.name}",
-                "achievement"
-            )
+        # Award points for the achievement without re-checking achievements
+        _record_reward(
+            user,
+            achievement["points_awarded"],
+            f"Earned achievement: {achievement['name']}",
+            "achievement"
+        )
     
-    db.session.commit()
     return earned_achievements
 
 def _update_recycling_streak(user):
@@ -258,4 +342,57 @@ def get_user_stats(user_id):
         "recycling_streak": user.recycling_streak,
         "total_points": total_points,
         "recent_rewards": rewards
-    }
\ No newline at end of file
+    }
+
+def reconcile_eco_points(fix=False):
+    """
+    Compare every user's eco_points balance against their Reward ledger
+    
+    The append-only ledger is authoritative: a mismatch means a balance
+    update was lost or applied twice, so fixing resets the balance to the
+    ledger sum and leaves the ledger untouched as the record of what was
+    awarded. Run it when no awards are in flight.
+    
+    Args:
+        fix: Set each mismatched eco_points balance to its ledger sum
+        
+    Returns:
+        List of dictionaries describing each mismatched user
+    """
+    ledger = db.select(
+        Reward.user_id,
+        db.func.sum(Reward.points).label("ledger_points")
+    ).group_by(Reward.user_id).subquery()
+    
+    ledger_points = db.func.coalesce(ledger.c.ledger_points, 0)
+    rows = db.session.execute(
+        db.select(User.id, User.username, User.eco_points, ledger_points)
+        .outerjoin(ledger, ledger.c.user_id == User.id)
+        .where(db.func.coalesce(User.eco_points, 0) != ledger_points)
+        .order_by(User.id)
+    ).all()
+    
+    mismatches = []
+    for user_id, username, eco_points, ledger_total in rows:
+        difference = (eco_points or 0) - ledger_total
+        mismatches.append({
+            "user_id": user_id,
+            "username": username,
+            "eco_points": eco_points or 0,
+            "ledger_points": ledger_total,
+            "difference": difference
+        })
+        
+        if fix:
+            logging.warning(
+                f"Resetting eco_points of user {user_id} from {eco_points or 0} "
+                f"to the ledger sum {ledger_total}"
+            )
+            db.session.execute(
+                db.update(User).where(User.id == user_id).values(eco_points=ledger_total)
+            )
+    
+    if fix and mismatches:
+        db.session.commit()
+    
+    return mismatches
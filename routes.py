@@ -7,9 +7,12 @@ from flask import render_template, request, redirect, url_for, flash, jsonify, s
 from werkzeug.utils import secure_filename
 from flask_login import current_user, login_required
 from app import db
-from models import WasteItem, DropLocation
+from models import WasteItem, DropLocation, WASTE_ITEM_CARD_OPTIONS, WASTE_ITEM_DETAIL_OPTIONS
 from gemini_service import analyze_waste
-from rewards import award_points_for_drop_off, check_achievements
+from rewards import award_points, award_points_for_drop_off
+from pagination import keyset_page, get_page_size
+import leaderboard_service
+from db_routing import read_only
 import logging
 from PIL import Image
 from datetime import datetime
@@ -17,6 +20,8 @@ from datetime import datetime
 # Import the route modules for our new features
 from tracking import register_tracking_routes
 from infrastructure import register_infrastructure_routes
+from export import register_export_routes
+from audit import register_audit_routes
 
 def register_routes(app):
     """Register all application routes"""
@@ -106,22 +111,91 @@ def register_routes(app):
         
         return render_template("index.html", result=result, image_path=image_path, waste_item=waste_item)
     
+    def _listing_query(**filters):
+        """Query for list cards, loading only the columns the cards show"""
+        return WasteItem.query.options(*WASTE_ITEM_CARD_OPTIONS).filter_by(**filters)
+    
+    def _listing_page(template, **filters):
+        """Fetch one keyset page of list cards as JSON with rendered HTML"""
+        page_size = request.args.get("page_size", type=int)
+        items, next_cursor = keyset_page(
+            _listing_query(**filters),
+            WasteItem,
+            cursor=request.args.get("cursor"),
+            page_size=get_page_size(page_size)
+        )
+        return jsonify({
+            "items": [
+                {
+                    "id": item.id,
+                    "title": item.title,
+                    "material": item.material,
+                    "image_path": item.image_path,
+                    "is_recyclable": item.is_recyclable,
+                    "is_ewaste": item.is_ewaste,
+                    "location": item.location,
+                    "municipality_status": item.municipality_status,
+                    "created_at": item.created_at.isoformat() if item.created_at else None,
+                    "url": url_for("item_details", item_id=item.id)
+                }
+                for item in items
+            ],
+            "html": render_template(template, items=items),
+            "next_cursor": next_cursor,
+            "next_url": url_for(request.endpoint, cursor=next_cursor, page_size=page_size) if next_cursor else None
+        })
+    
     @app.route("/marketplace")
+    @read_only
     def marketplace():
         """Display marketplace listings"""
-        items = WasteItem.query.filter_by(is_listed=True).order_by(WasteItem.created_at.desc()).all()
-        return render_template("marketplace.html", items=items)
+        page_size = request.args.get("page_size", type=int)
+        items, next_cursor = keyset_page(_listing_query(is_listed=True), WasteItem, page_size=get_page_size(page_size))
+        return render_template("marketplace.html", items=items, next_cursor=next_cursor, page_size=page_size)
+    
+    @app.route("/api/marketplace")
+    @read_only
+    def api_marketplace():
+        """Next page of marketplace listings for infinite scroll"""
+        return _listing_page("marketplace_items.html", is_listed=True)
     
     @app.route("/municipality")
+    @read_only
     def municipality():
         """Display items routed to municipality"""
-        items = WasteItem.query.filter_by(sent_to_municipality=True).order_by(WasteItem.created_at.desc()).all()
-        return render_template("municipality.html", items=items)
+        page_size = request.args.get("page_size", type=int)
+        items, next_cursor = keyset_page(_listing_query(sent_to_municipality=True), WasteItem, page_size=get_page_size(page_size))
+        return render_template("municipality.html", items=items, next_cursor=next_cursor, page_size=page_size)
+    
+    @app.route("/api/municipality")
+    @read_only
+    def api_municipality():
+        """Next page of municipality items for infinite scroll"""
+        return _listing_page("municipality_items.html", sent_to_municipality=True)
+    
+    @app.route("/leaderboard")
+    @read_only
+    def leaderboard():
+        """Display the city-wide and weekly eco-points leaderboards"""
+        city_leaders = leaderboard_service.get_city_leaderboard()
+        weekly_leaders = leaderboard_service.get_leaderboard(leaderboard_service.get_weekly_board())
+        ranks = leaderboard_service.get_user_ranks(current_user.id) if current_user.is_authenticated else None
+        
+        return render_template(
+            "leaderboard.html",
+            city_leaders=city_leaders,
+            weekly_leaders=weekly_leaders,
+            week_start=leaderboard_service.get_week_start(),
+            ranks=ranks
+        )
     
     @app.route("/item/<int:item_id>")
+    @read_only
     def item_details(item_id):
         """Display details for a specific item"""
-        item = WasteItem.query.get_or_404(item_id)
+        item = WasteItem.query.options(*WASTE_ITEM_DETAIL_OPTIONS).filter_by(
+            id=item_id
+        ).first_or_404()
         return render_template("item_details.html", item=item)
     
     @app.route("/list-item", methods=["GET", "POST"])
@@ -164,7 +238,6 @@ def register_routes(app):
         item = WasteItem.query.get_or_404(item_id)
         item.sent_to_municipality = True
         item.municipality_status = "Pending"
-        db.session.commit()
         
         # Award points to the logged-in user if authenticated
         if current_user.is_authenticated:
@@ -192,28 +265,25 @@ def register_routes(app):
                     points = 50
                     reward_desc = "Sending waste for municipal recycling"
                 
-                # Create a reward record
-                from models import Reward
-                reward = Reward(
-                    user_id=current_user.id,
-                    points=points,
-                    description=reward_desc,
-                    reward_type="municipality"
-                )
-                db.session.add(reward)
+                # Record the reward, update points and check achievements
+                award_points(current_user.id, points, reward_desc, "municipality")
                 
-                # Update user's eco points
-                current_user.eco_points += points
+                # Commit the item status and all reward changes together
                 db.session.commit()
                 
-                # Check if the user has earned any achievements
-                check_achievements(current_user.id)
-                
                 flash(f"Item sent to municipality successfully! You earned {points} eco-points.", "success")
             except Exception as e:
                 logging.error(f"Error awarding points: {e}")
+                db.session.rollback()
+                
+                # Still route the item even though the rewards failed
+                item = WasteItem.query.get_or_404(item_id)
+                item.sent_to_municipality = True
+                item.municipality_status = "Pending"
+                db.session.commit()
                 flash("Item sent to municipality successfully, but there was an error awarding points.", "warning")
         else:
+            db.session.commit()
             flash("Item sent to municipality successfully. Log in to earn eco-points for your contributions!", "info")
             
         return redirect(url_for("item_details", item_id=item_id))
@@ -304,13 +374,13 @@ def register_routes(app):
                 is_recyclable=True  # Assuming items being dropped off are recyclable
             )
             db.session.add(waste_item)
-            db.session.commit()
+            db.session.flush()
             
-            # Award points for the drop-off
+            # Award points for the drop-off (also checks achievements)
             award_points_for_drop_off(current_user.id, waste_item.id, drop_location_id)
             
-            # Check if user has earned any achievements
-            check_achievements(current_user.id)
+            # Commit the item, points, streak and achievements together
+            db.session.commit()
             
             flash("Thank you for your check-in! You've been awarded eco-points for your contribution.", "success")
             
@@ -328,3 +398,5 @@ def register_routes(app):
     # Register routes for our new features
     register_tracking_routes(app)
     register_infrastructure_routes(app)
+    register_export_routes(app)
+    register_audit_routes(app)
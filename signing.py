@@ -0,0 +1,98 @@
+"""
+Ed25519 signatures for sealing waste journey blocks.
+
+In signature sealing mode a block is signed by its verifier's private key
+instead of being mined. Signing and verifying take constant time per block,
+and a valid signature proves which verifier sealed the stage.
+
+Keys are stored as raw 32-byte values. Private keys live only on the
+verifier's own machine; public keys are registered in the verifier table.
+
+This module has no app imports so it can run in worker processes.
+"""
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+except ImportError:  # Optional: only needed for signature sealing
+    Ed25519PrivateKey = None
+
+def is_available():
+    """Return True if the cryptography package is installed"""
+    return Ed25519PrivateKey is not None
+
+def _require_cryptography():
+    if not is_available():
+        raise RuntimeError("Signature sealing requires the 'cryptography' package")
+
+def generate_key_pair():
+    """
+    Generate a new Ed25519 key pair.
+
+    Returns:
+        Tuple of (raw private key bytes, raw public key bytes)
+    """
+    _require_cryptography()
+    private_key = Ed25519PrivateKey.generate()
+    private_bytes = private_key.private_bytes(
+        serialization.Encoding.Raw, serialization.PrivateFormat.Raw, serialization.NoEncryption()
+    )
+    public_bytes = private_key.public_key().public_bytes(
+        serialization.Encoding.Raw, serialization.PublicFormat.Raw
+    )
+    return private_bytes, public_bytes
+
+def load_private_key(private_bytes):
+    """Load a private key from its raw bytes"""
+    _require_cryptography()
+    return Ed25519PrivateKey.from_private_bytes(private_bytes)
+
+def sign(private_key, data):
+    """
+    Sign data with a loaded private key.
+
+    Returns:
+        64-byte signature
+    """
+    return private_key.sign(bytes(data))
+
+class SignatureVerifier:
+    """
+    Verifies block signatures against registered public keys.
+    Each public key is parsed once and reused for every block it sealed.
+    """
+
+    def __init__(self, public_keys):
+        """
+        Args:
+            public_keys: Dictionary mapping verifier ID to raw public key bytes
+        """
+        self.public_keys = public_keys
+        self._loaded = {}
+
+    def _get_key(self, verifier_id):
+        if verifier_id not in self._loaded:
+            public_bytes = self.public_keys.get(verifier_id)
+            self._loaded[verifier_id] = (
+                Ed25519PublicKey.from_public_bytes(bytes(public_bytes)) if public_bytes else None
+            )
+        return self._loaded[verifier_id]
+
+    def verify(self, verifier_id, data, signature):
+        """
+        Check one signature.
+
+        Returns:
+            True if the verifier's key signed the data
+        """
+        if not is_available() or signature is None or data is None:
+            return False
+        public_key = self._get_key(verifier_id)
+        if public_key is None:
+            return False
+        try:
+            public_key.verify(bytes(signature), bytes(data))
+            return True
+        except InvalidSignature:
+            return False
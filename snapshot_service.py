@@ -0,0 +1,108 @@
+"""
+Static snapshot service for public waste verification pages.
+The page behind a verification QR code only changes when a journey block is
+appended, so it is rendered once per change and written to disk as HTML
+together with its JSON. QR scans are then served from the files without
+touching the database.
+
+Snapshots are keyed by waste item only, so in a multi-server deployment
+VERIFY_SNAPSHOT_FOLDER must be shared storage (or served by the web server
+directly) for every server to see a rewritten or removed snapshot.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from flask import render_template
+from app import app
+from models import WasteItem
+import blockchain_service
+
+# Snapshot files of one waste item, by format
+SNAPSHOT_FILES = {
+    'html': 'index.html',
+    'json': 'journey.json'
+}
+
+def get_snapshot_path(waste_item_id, snapshot_format='html'):
+    """
+    Get the path of a waste item's verification snapshot file.
+
+    Args:
+        waste_item_id: ID of the waste item
+        snapshot_format: 'html' or 'json'
+
+    Returns:
+        File path (which may not exist yet)
+    """
+    return os.path.join(app.config["VERIFY_SNAPSHOT_FOLDER"], str(waste_item_id), SNAPSHOT_FILES[snapshot_format])
+
+def _write_atomic(path, content):
+    # A unique temp file per write, so threads refreshing the same snapshot do not collide
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(path),
+                                     suffix='.tmp', delete=False) as snapshot_file:
+        snapshot_file.write(content)
+    os.replace(snapshot_file.name, path)  # Atomic, so concurrent workers never serve a partial file
+
+def write_verification_snapshot(waste_item_id):
+    """
+    Render a waste item's public verification page and its JSON to disk.
+    Uses its own app and request context so the page is rendered exactly as
+    an anonymous visitor sees it, whoever triggered the write.
+
+    Args:
+        waste_item_id: ID of the waste item
+
+    Returns:
+        True if the snapshot was written, False if the item does not exist
+    """
+    path = app.url_map.bind('localhost').build('verify_waste', {'item_id': waste_item_id})
+    with app.app_context(), app.test_request_context(path):
+        waste_item = WasteItem.query.get(waste_item_id)
+        if waste_item is None:
+            return False
+
+        journey = blockchain_service.JourneyView(waste_item)
+        html = render_template(
+            'waste_verification.html',
+            waste_item=waste_item,
+            journey_blocks=journey.blocks,
+            journey_stages=blockchain_service.get_journey_stages(),
+            journey_progress=journey.progress,
+            is_journey_valid=journey.is_valid
+        )
+        api_data = journey.to_api_dict()
+
+    os.makedirs(os.path.dirname(get_snapshot_path(waste_item_id)), exist_ok=True)
+    _write_atomic(get_snapshot_path(waste_item_id, 'json'), json.dumps(api_data))
+    _write_atomic(get_snapshot_path(waste_item_id, 'html'), html)
+    return True
+
+def refresh_verification_snapshot(waste_item_id):
+    """
+    Rewrite a waste item's snapshot after its journey changed.
+    Failures are logged rather than raised, since the change itself is
+    already committed and the next scan re-renders a missing snapshot.
+
+    Args:
+        waste_item_id: ID of the waste item
+    """
+    try:
+        write_verification_snapshot(waste_item_id)
+    except Exception as e:
+        logging.error(f"Error writing verification snapshot for waste item {waste_item_id}: {str(e)}")
+        remove_verification_snapshot(waste_item_id)
+
+def remove_verification_snapshot(waste_item_id):
+    """
+    Drop a waste item's snapshot so the next scan renders a fresh one.
+
+    Args:
+        waste_item_id: ID of the waste item
+    """
+    for snapshot_format in SNAPSHOT_FILES:
+        try:
+            os.remove(get_snapshot_path(waste_item_id, snapshot_format))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,150 @@
+"""
+SQLite tuning for WasteWorks when running without DATABASE_URL.
+
+Several gunicorn workers share one SQLite file, so this profile:
+- switches the database to WAL journaling so readers never block the writer
+- uses synchronous=NORMAL, which is durable in WAL mode except on power loss
+- enlarges the page cache and memory-maps the file
+- waits on a busy timeout instead of failing with "database is locked"
+- queues writers, and SELECT ... FOR UPDATE readers, so only one thread per
+  machine writes at a time
+
+Set SQLITE_PROFILE=0 to fall back to SQLite's defaults (used by
+benchmarks/sqlite_write_bench.py for comparison).
+"""
+
+import logging
+import os
+import threading
+from sqlalchemy import event
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads within one process are queued
+    fcntl = None
+
+BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 30000))
+CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", 65536))
+MMAP_SIZE_BYTES = int(os.environ.get("SQLITE_MMAP_SIZE_BYTES", 256 * 1024 * 1024))
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    f"PRAGMA cache_size=-{CACHE_SIZE_KB}",
+    f"PRAGMA mmap_size={MMAP_SIZE_BYTES}",
+    "PRAGMA temp_store=MEMORY",
+)
+
+def is_enabled():
+    """Return True unless the profile was switched off with SQLITE_PROFILE=0"""
+    return os.environ.get("SQLITE_PROFILE", "1") != "0"
+
+def engine_options():
+    """
+    SQLAlchemy engine options for a file-backed SQLite database.
+
+    Returns:
+        Dictionary for SQLALCHEMY_ENGINE_OPTIONS
+    """
+    return {
+        "pool_pre_ping": True,
+        "connect_args": {
+            "timeout": BUSY_TIMEOUT_MS / 1000,
+            "check_same_thread": False,
+        },
+    }
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+class WriterQueue:
+    """
+    Lets one thread write at a time, across threads and worker processes.
+    Threads queue on a reentrant lock; processes queue on an flock'd lock file.
+
+    The queue is owned by a thread rather than a session, so a second session
+    opened by the writing thread (e.g. a snapshot rendered in its own app
+    context before the outer transaction commits) joins without waiting on
+    itself. It is held from the first write until the transaction ends, which
+    is as long as SQLite itself holds the database write lock.
+    """
+
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._lock_file = None
+        self._lock_file_pid = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        self._depth += 1
+        if self._depth == 1 and fcntl is not None:
+            # A forked worker shares its parent's open file, and with it the
+            # flock, so each process opens the lock file itself
+            if self._lock_file is None or self._lock_file_pid != os.getpid():
+                self._lock_file = open(self.lock_path, "a")
+                self._lock_file_pid = os.getpid()
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and fcntl is not None and self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+def _join_writer_queue(session, queue):
+    if not session.info.get("sqlite_writer"):
+        queue.acquire()
+        session.info["sqlite_writer"] = True
+
+def _leave_writer_queue(session, queue):
+    if session.info.pop("sqlite_writer", False):
+        queue.release()
+
+def configure(db, session_class):
+    """
+    Apply the profile to the app's SQLite engine and sessions.
+    Must be called inside an app context, before the first connection.
+
+    Args:
+        db: Flask-SQLAlchemy extension
+        session_class: Session class used by db.session
+    """
+    engine = db.engine
+    if engine.dialect.name != "sqlite" or not is_enabled():
+        return
+
+    database_path = engine.url.database
+    if not database_path or database_path == ":memory:":
+        return
+
+    event.listen(engine, "connect", _apply_pragmas)
+
+    queue = WriterQueue(f"{database_path}-writer.lock")
+
+    @event.listens_for(session_class, "before_flush")
+    def _queue_flush(session, flush_context, instances):
+        _join_writer_queue(session, queue)
+
+    @event.listens_for(session_class, "do_orm_execute")
+    def _queue_bulk_write(orm_execute_state):
+        if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+            _join_writer_queue(orm_execute_state.session, queue)
+        elif orm_execute_state.is_select and orm_execute_state.statement._for_update_arg is not None:
+            # SQLite ignores FOR UPDATE, so a locking read (e.g. of a journey's
+            # chain head before appending to it) queues as a writer instead
+            _join_writer_queue(orm_execute_state.session, queue)
+
+    @event.listens_for(session_class, "after_transaction_end")
+    def _release_writer(session, transaction):
+        if transaction.parent is None:
+            _leave_writer_queue(session, queue)
+
+    logging.info("SQLite profile enabled: WAL, synchronous=NORMAL, busy timeout, writer queue")
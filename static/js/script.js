@@ -55,41 +55,45 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Material icon selection based on material type
-    const materialIcons = document.querySelectorAll('.material-icon');
-    materialIcons.forEach(icon => {
-        const material = icon.dataset.material.toLowerCase();
-        let iconClass = 'fa-question';
+    function applyMaterialIcons(root) {
+        const materialIcons = root.querySelectorAll('.material-icon');
+        materialIcons.forEach(icon => {
+            const material = icon.dataset.material.toLowerCase();
+            let iconClass = 'fa-question';
         
-        // Select appropriate icon based on material
-        switch(material) {
-            case 'plastic':
-                iconClass = 'fa-wine-bottle';
-                break;
-            case 'paper':
-                iconClass = 'fa-newspaper';
-                break;
-            case 'metal':
-                iconClass = 'fa-cog';
-                break;
-            case 'glass':
-                iconClass = 'fa-glass-martini';
-                break;
-            case 'electronic':
-                iconClass = 'fa-laptop';
-                break;
-            case 'textile':
-                iconClass = 'fa-tshirt';
-                break;
-            case 'organic':
-                iconClass = 'fa-leaf';
-                break;
-            default:
-                iconClass = 'fa-recycle';
-        }
+            // Select appropriate icon based on material
+            switch(material) {
+                case 'plastic':
+                    iconClass = 'fa-wine-bottle';
+                    break;
+                case 'paper':
+                    iconClass = 'fa-newspaper';
+                    break;
+                case 'metal':
+                    iconClass = 'fa-cog';
+                    break;
+                case 'glass':
+                    iconClass = 'fa-glass-martini';
+                    break;
+                case 'electronic':
+                    iconClass = 'fa-laptop';
+                    break;
+                case 'textile':
+                    iconClass = 'fa-tshirt';
+                    break;
+                case 'organic':
+                    iconClass = 'fa-leaf';
+                    break;
+                default:
+                    iconClass = 'fa-recycle';
+            }
         
-        // Add the selected icon class
-        icon.classList.add('fas', iconClass);
-    });
+            // Add the selected icon class
+            icon.classList.add('fas', iconClass);
+        });
+    }
+    
+    applyMaterialIcons(document);
     
     // Copy analysis text
     const copyBtn = document.getElementById('copy-analysis');
@@ -137,6 +141,52 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Infinite scroll for paginated lists (marketplace, municipality)
+    document.querySelectorAll('[data-infinite-scroll]').forEach(sentinel => {
+        const target = document.querySelector(sentinel.dataset.target);
+        const counter = document.querySelector('[data-item-count]');
+        const moreIndicator = document.querySelector('[data-more-indicator]');
+        let loading = false;
+        
+        const observer = new IntersectionObserver(entries => {
+            if (!entries[0].isIntersecting || loading || !sentinel.dataset.nextUrl) {
+                return;
+            }
+            
+            loading = true;
+            fetch(sentinel.dataset.nextUrl, { headers: { 'Accept': 'application/json' } })
+                .then(response => response.json())
+                .then(page => {
+                    const template = document.createElement('template');
+                    template.innerHTML = page.html;
+                    applyMaterialIcons(template.content);
+                    target.appendChild(template.content);
+                    
+                    if (counter) {
+                        counter.textContent = parseInt(counter.textContent, 10) + page.items.length;
+                    }
+                    
+                    if (page.next_url) {
+                        sentinel.dataset.nextUrl = page.next_url;
+                    } else {
+                        observer.disconnect();
+                        sentinel.remove();
+                        if (moreIndicator) {
+                            moreIndicator.remove();
+                        }
+                    }
+                })
+                .catch(err => {
+                    console.error('Failed to load more items: ', err);
+                })
+                .finally(() => {
+                    loading = false;
+                });
+        }, { rootMargin: '400px' });
+        
+        observer.observe(sentinel);
+    });
+    
     // Bootstrap tooltips initialization
     const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
     tooltipTriggerList.map(function (tooltipTriggerEl) {
@@ -0,0 +1,29 @@
+"""
+Copy the SQLite primary database into the SQLite replica file.
+Lets you try read replica routing locally without a real replication setup:
+
+    DATABASE_URL=sqlite:///primary.db DATABASE_REPLICA_URL=sqlite:///replica.db python sync_replica.py
+"""
+
+import sys
+import logging
+from app import app, db
+from db_routing import REPLICA_BIND_KEY, sync_sqlite_replica
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+
+if __name__ == '__main__':
+    with app.app_context():
+        primary = db.engines[None]
+        replica = db.engines.get(REPLICA_BIND_KEY)
+        
+        if replica is None or primary.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+            logging.error("Both DATABASE_URL and DATABASE_REPLICA_URL must be SQLite URLs.")
+            sys.exit(1)
+        
+        sync_sqlite_replica(primary.url.database, replica.url.database)
+        logging.info(f"Copied {primary.url.database} to {replica.url.database}")
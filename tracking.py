@@ -3,15 +3,43 @@ Waste tracking routes for WasteWorks.
 Handles the blockchain-like tracking system for waste items.
 """
 
-from flask import render_template, request, redirect, url_for, flash, jsonify
+import json
+import os
+from flask import render_template, request, redirect, url_for, flash, jsonify, abort, send_file
 from flask_login import login_required, current_user
 from models import WasteItem, WasteJourneyBlock
 from app import db
 import blockchain_service
+import qr_service
+import snapshot_service
+from db_routing import read_only
+
+try:
+    import orjson
+except ImportError:  # Optional: the journey API falls back to the json module
+    orjson = None
+
+# Most waste items one bulk stage request may advance
+BULK_STAGE_MAX_ITEMS = 1000
+
+# Browser and CDN cache lifetime of QR images (they only encode the item's verification URL)
+QR_MAX_AGE_SECONDS = 30 * 24 * 3600
+
+# Cache lifetime of verification page snapshots; after it, clients revalidate
+# with the snapshot's ETag, since the page changes when a block is appended
+VERIFY_SNAPSHOT_MAX_AGE_SECONDS = 60
 
 def register_tracking_routes(app):
     """Register waste tracking routes"""
 
+    @app.context_processor
+    def journey_helpers():
+        """Let list templates show journey progress from an item's stored chain head"""
+        return {
+            'journey_stage_names': {key: stage['name'] for key, stage in blockchain_service.JOURNEY_STAGES.items()},
+            'journey_progress_pct': blockchain_service.get_progress_pct
+        }
+
     @app.route('/waste/track/<int:item_id>')
     @login_required
     def track_waste(item_id):
@@ -25,27 +53,19 @@ def register_tracking_routes(app):
             flash('You do not have permission to view this item', 'danger')
             return redirect(url_for('index'))
         
-        # Get waste journey blocks
-        journey_blocks = blockchain_service.get_waste_journey(item_id)
+        # Load the journey blocks once for progress, integrity and QR data
+        journey = blockchain_service.JourneyView(waste_item)
         journey_stages = blockchain_service.get_journey_stages()
         
-        # Get journey progress
-        journey_progress = blockchain_service.get_journey_progress(item_id)
-        
-        # Verify journey integrity
-        is_journey_valid = blockchain_service.verify_journey_integrity(item_id)
-        
-        # Generate QR code data
-        qr_data = blockchain_service.generate_qr_code_data(item_id)
-        
         return render_template(
             'waste_tracking.html',
             waste_item=waste_item,
-            journey_blocks=journey_blocks,
+            journey_blocks=journey.blocks,
             journey_stages=journey_stages,
-            journey_progress=journey_progress,
-            is_journey_valid=is_journey_valid,
-            qr_data=qr_data
+            journey_progress=journey.progress,
+            is_journey_valid=journey.is_valid,
+            qr_data=journey.qr_data,
+            qr_image_available=qr_service.is_available()
         )
     
     @app.route('/waste/track/add_stage/<int:item_id>', methods=['POST'])
@@ -76,62 +96,132 @@ def register_tracking_routes(app):
         
         return redirect(url_for('track_waste', item_id=item_id))
     
+    @app.route('/api/waste/journey/bulk_add_stage', methods=['POST'])
+    @login_required
+    def api_bulk_add_journey_stage():
+        """
+        Add the same stage to many waste journeys at once (collection runs).
+        Expects JSON with item_ids, stage, location, details and verified_by.
+        """
+        data = request.get_json(silent=True) or {}
+        item_ids = data.get('item_ids')
+        stage = data.get('stage')
+        
+        if not isinstance(item_ids, list) or not item_ids:
+            return jsonify({'error': 'item_ids must be a non-empty list'}), 400
+        if len(item_ids) > BULK_STAGE_MAX_ITEMS:
+            return jsonify({'error': f'At most {BULK_STAGE_MAX_ITEMS} items per request'}), 400
+        if stage not in blockchain_service.JOURNEY_STAGES:
+            return jsonify({'error': 'Unknown journey stage'}), 400
+        
+        try:
+            item_ids = [int(item_id) for item_id in item_ids]
+        except (TypeError, ValueError):
+            return jsonify({'error': 'item_ids must be integers'}), 400
+        
+        block_ids = blockchain_service.create_journey_blocks(
+            waste_item_ids=item_ids,
+            stage=stage,
+            location=data.get('location'),
+            details=data.get('details'),
+            verified_by=data.get('verified_by') or f"User {current_user.id}"
+        )
+        
+        return jsonify({
+            'stage': stage,
+            'added': len(block_ids),
+            'blocks': [{'waste_item_id': item_id, 'block_id': block_id} for item_id, block_id in block_ids.items()],
+            'missing_item_ids': [item_id for item_id in dict.fromkeys(item_ids) if item_id not in block_ids]
+        })
+    
+    @app.route('/waste/qr/<int:item_id>.<image_format>')
+    @read_only
+    def waste_qr_image(item_id, image_format):
+        """
+        Verification QR code of a waste item as a PNG or SVG image.
+        Rendered once and then served from the disk cache.
+        """
+        if image_format not in qr_service.QR_IMAGE_FORMATS or not qr_service.is_available():
+            abort(404)
+        
+        WasteItem.query.get_or_404(item_id)
+        etag = qr_service.get_qr_etag(item_id, image_format)
+        
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = send_file(
+                qr_service.get_qr_image_path(item_id, image_format),
+                mimetype=qr_service.QR_IMAGE_FORMATS[image_format],
+                conditional=False,
+                etag=False,
+                max_age=QR_MAX_AGE_SECONDS
+            )
+        
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = QR_MAX_AGE_SECONDS
+        return response
+    
     @app.route('/waste/verify/<int:item_id>')
+    @read_only
     def verify_waste(item_id):
         """
         Public verification page for a waste item (no login required)
-        This allows anyone with the QR code to verify the journey
+        This allows anyone with the QR code to verify the journey.
+        Anonymous visitors get the static snapshot, without a database query.
         """
+        if not current_user.is_authenticated:
+            return _send_verification_snapshot(item_id, 'html')
+        
         waste_item = WasteItem.query.get_or_404(item_id)
         
-        # Get waste journey blocks
-        journey_blocks = blockchain_service.get_waste_journey(item_id)
+        # Load the journey blocks once for progress and integrity
+        journey = blockchain_service.JourneyView(waste_item)
         journey_stages = blockchain_service.get_journey_stages()
         
-        # Verify journey integrity
-        is_journey_valid = blockchain_service.verify_journey_integrity(item_id)
-        
-        # Get journey progress
-        journey_progress = blockchain_service.get_journey_progress(item_id)
-        
         return render_template(
             'waste_verification.html',
             waste_item=waste_item,
-            journey_blocks=journey_blocks,
+            journey_blocks=journey.blocks,
             journey_stages=journey_stages,
-            journey_progress=journey_progress,
-            is_journey_valid=is_journey_valid
+            journey_progress=journey.progress,
+            is_journey_valid=journey.is_valid
+        )
+    
+    @app.route('/waste/verify/<int:item_id>.json')
+    @read_only
+    def verify_waste_json(item_id):
+        """
+        Public journey data of a waste item, served from its static snapshot
+        """
+        return _send_verification_snapshot(item_id, 'json')
+    
+    def _send_verification_snapshot(item_id, snapshot_format):
+        path = snapshot_service.get_snapshot_path(item_id, snapshot_format)
+        if not os.path.exists(path) and not snapshot_service.write_verification_snapshot(item_id):
+            abort(404)
+        
+        # Conditional response with the file's ETag and Last-Modified
+        return send_file(
+            path,
+            mimetype='application/json' if snapshot_format == 'json' else 'text/html',
+            max_age=VERIFY_SNAPSHOT_MAX_AGE_SECONDS
         )
     
     @app.route('/api/waste/journey/<int:item_id>')
+    @read_only
     def api_waste_journey(item_id):
         """
         API endpoint for waste journey data (for ajax calls)
+        One column-only query, no ORM objects, and a cached integrity verdict
         """
-        waste_item = WasteItem.query.get_or_404(item_id)
+        data = blockchain_service.get_journey_api_data(item_id)
+        if data is None:
+            abort(404)
         
-        # Get waste journey blocks
-        journey_blocks = blockchain_service.get_waste_journey(item_id)
-        journey_stages = blockchain_service.get_journey_stages()
-        
-        # Format for API response
-        blocks_data = []
-        for block in journey_blocks:
-            blocks_data.append({
-                'id': block.id,
-                'stage': block.stage,
-                'stage_name': journey_stages[block.stage]['name'] if block.stage in journey_stages else block.stage,
-                'location': block.location,
-                'details': block.details,
-                'timestamp': block.timestamp.isoformat(),
-                'verified_by': block.verified_by,
-                'block_hash': block.block_hash[:10] + '...' + block.block_hash[-10:]  # Truncated for display
-            })
-        
-        return jsonify({
-            'waste_item_id': item_id,
-            'material': waste_item.material,
-            'is_recyclable': waste_item.is_recyclable,
-            'blocks': blocks_data,
-            'is_valid': blockchain_service.verify_journey_integrity(item_id)
-        })
\ No newline at end of file
+        if orjson is not None:
+            body = orjson.dumps(data)
+        else:
+            body = json.dumps(data, separators=(',', ':'))
+        return app.response_class(body, mimetype='application/json')
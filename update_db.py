@@ -1,25 +1,20 @@
 """
 Update the database schema to add missing columns.
-<<<<<<< HEAD
 Uses explicit transaction management and better error handling.
 """
 
-=======
-Uses explicit transaction management and better error handling for deployments.
-"""
-
-import os
->>>>>>> 29a39b63817c010f5cf573453f1150bf94574afe
 import sys
 import logging
 from app import app, db
 from sqlalchemy import text, inspect
+from sqlalchemy.schema import CreateIndex
+from blockchain_service import check_chain_heads
+from cluster_service import rebuild_clusters
+from audit_service import backfill_checkpoint_trees
+from models import InfrastructureCluster
+import geo
 
-<<<<<<< HEAD
 # Configure logging
-=======
-# Configure more detailed logging
->>>>>>> 29a39b63817c010f5cf573453f1150bf94574afe
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -41,7 +36,6 @@ def check_if_column_exists(conn, table_name, column_name):
     logging.info(f"Column '{column_name}' in table '{table_name}' exists: {exists}")
     return exists
 
-<<<<<<< HEAD
 def add_column_if_missing(conn, table_name, column_name, column_type_sql):
     """Add a column if it's missing."""
     if not check_if_column_exists(conn, table_name, column_name):
@@ -51,6 +45,80 @@ def add_column_if_missing(conn, table_name, column_name, column_type_sql):
     else:
         logging.info(f"Column '{column_name}' already exists. Skipping...")
 
+def create_indexes_if_missing(conn, table_name):
+    """Create any indexes declared on the model that the table is missing."""
+    # IF NOT EXISTS rather than checkfirst: reflection skips expression indexes
+    for index in db.metadata.tables[table_name].indexes:
+        conn.execute(CreateIndex(index, if_not_exists=True))
+
+def convert_material_detection_to_json(conn):
+    """
+    Convert waste_item.material_detection from TEXT to JSONB on PostgreSQL.
+    SQLite stores JSON as text already, so existing rows need no conversion there.
+    """
+    if conn.dialect.name != 'postgresql':
+        return
+    
+    column_type = conn.execute(text(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_name = 'waste_item' AND column_name = 'material_detection'"
+    )).scalar()
+    
+    if column_type and column_type.lower() != 'jsonb':
+        logging.info("Converting material_detection column to JSONB...")
+        conn.execute(text(
+            'ALTER TABLE "waste_item" ALTER COLUMN "material_detection" '
+            'TYPE JSONB USING NULLIF("material_detection", \'\')::jsonb;'
+        ))
+
+def allow_reports_without_images(conn):
+    """
+    Let infrastructure_report.image_path be NULL for reports without a photo
+    on PostgreSQL, and clear the empty paths stored for them before.
+    SQLite cannot drop NOT NULL in place; recreate older SQLite tables instead.
+    """
+    if conn.dialect.name != 'postgresql':
+        return
+    
+    conn.execute(text('ALTER TABLE "infrastructure_report" ALTER COLUMN "image_path" DROP NOT NULL;'))
+    cleared = conn.execute(text(
+        'UPDATE "infrastructure_report" SET image_path = NULL WHERE image_path = \'\''
+    )).rowcount
+    if cleared:
+        logging.info(f"Cleared empty image paths of {cleared} infrastructure report(s).")
+
+def backfill_report_geohashes(conn, batch_size=1000):
+    """Compute the geohash of geotagged reports that do not have one yet."""
+    filled = 0
+    while True:
+        rows = conn.execute(text(
+            'SELECT id, latitude, longitude FROM "infrastructure_report" '
+            'WHERE geohash IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL '
+            'LIMIT :limit'
+        ), {'limit': batch_size}).all()
+        if not rows:
+            break
+        conn.execute(
+            text('UPDATE "infrastructure_report" SET geohash = :geohash WHERE id = :id'),
+            [{'id': row.id, 'geohash': geo.encode_geohash(row.latitude, row.longitude)} for row in rows]
+        )
+        filled += len(rows)
+    if filled:
+        logging.info(f"Backfilled geohashes for {filled} infrastructure report(s).")
+
+def backfill_waste_item_created_at(conn):
+    """
+    Give waste items without a creation time the oldest one in the table,
+    so keyset-paginated listings (ordered by created_at) list them with the oldest.
+    """
+    filled = conn.execute(text(
+        'UPDATE "waste_item" SET created_at = COALESCE('
+        '(SELECT MIN(created_at) FROM "waste_item"), CURRENT_TIMESTAMP) '
+        'WHERE created_at IS NULL'
+    )).rowcount
+    if filled:
+        logging.info(f"Backfilled creation times for {filled} waste item(s).")
+
 def update_waste_item_table():
     """Add missing columns to the waste_item table."""
     with app.app_context():
@@ -66,65 +134,59 @@ def update_waste_item_table():
                 # Required columns and their types (SQLite-safe)
                 required_columns = {
                     'user_id': 'INTEGER',
-                    'material_detection': 'TEXT',
+                    'material_detection': 'TEXT',  # Converted to JSONB on PostgreSQL below
                     'recycling_completed': 'INTEGER DEFAULT 0',  # BOOLEAN in SQLite
                     'recycling_completion_date': 'TIMESTAMP',
                     'summary': 'TEXT',
                     'is_dropped_off': 'INTEGER DEFAULT 0',  # BOOLEAN in SQLite
                     'drop_location_id': 'INTEGER',
-                    'drop_date': 'TIMESTAMP'
+                    'drop_date': 'TIMESTAMP',
+                    'head_block_hash': 'VARCHAR(64)',
+                    'current_stage': 'VARCHAR(50)',
+                    'blocks_count': 'INTEGER DEFAULT 0'
                 }
 
                 for column, column_type in required_columns.items():
                     add_column_if_missing(conn, table_name, column, column_type)
 
-            logging.info("✅ Database schema update completed successfully.")
-        except Exception as e:
-            logging.error(f"❌ Error updating database schema: {str(e)}")
-
-if __name__ == '__main__':
-    update_waste_item_table()
-=======
-def update_waste_item_table():
-    """Add missing columns to the waste_item table with better error handling."""
-    with app.app_context():
-        logging.info("Starting database schema update...")
-        try:
-            # Use modern SQLAlchemy execution API with explicit transaction
-            with db.engine.begin() as conn:
-                # First check if the table exists
-                if not check_if_table_exists(conn, 'waste_item'):
-                    logging.warning("waste_item table doesn't exist yet. Will be created by app startup.")
-                    return
+                convert_material_detection_to_json(conn)
+                backfill_waste_item_created_at(conn)
 
-                # Add material_detection column if it doesn't exist
-                if not check_if_column_exists(conn, 'waste_item', 'material_detection'):
-                    logging.info("Adding material_detection column...")
-                    conn.execute(text('ALTER TABLE waste_item ADD COLUMN material_detection TEXT;'))
-                
-                # Add recycling_completed column if it doesn't exist
-                if not check_if_column_exists(conn, 'waste_item', 'recycling_completed'):
-                    logging.info("Adding recycling_completed column...")
-                    conn.execute(text('ALTER TABLE waste_item ADD COLUMN recycling_completed BOOLEAN DEFAULT FALSE;'))
+                # Binary block encoding (legacy blocks keep NULL hash_version)
+                if check_if_table_exists(conn, 'waste_journey_block'):
+                    binary_type = 'BYTEA' if conn.dialect.name == 'postgresql' else 'BLOB'
+                    add_column_if_missing(conn, 'waste_journey_block', 'hash_version', 'INTEGER')
+                    add_column_if_missing(conn, 'waste_journey_block', 'encoded_data', binary_type)
+                    add_column_if_missing(conn, 'waste_journey_block', 'verifier_id', 'INTEGER')
+                    add_column_if_missing(conn, 'waste_journey_block', 'signature', binary_type)
                 
-                # Add recycling_completion_date column if it doesn't exist
-                if not check_if_column_exists(conn, 'waste_item', 'recycling_completion_date'):
-                    logging.info("Adding recycling_completion_date column...")
-                    conn.execute(text('ALTER TABLE waste_item ADD COLUMN recycling_completion_date TIMESTAMP;'))
+                # Geohash spatial index of infrastructure reports
+                if check_if_table_exists(conn, 'infrastructure_report'):
+                    add_column_if_missing(conn, 'infrastructure_report', 'geohash', 'VARCHAR(12)')
+                    backfill_report_geohashes(conn)
+                    allow_reports_without_images(conn)
+                    create_indexes_if_missing(conn, 'infrastructure_report')
                 
-                # Add summary column if it doesn't exist
-                if not check_if_column_exists(conn, 'waste_item', 'summary'):
-                    logging.info("Adding summary column...")
-                    conn.execute(text('ALTER TABLE waste_item ADD COLUMN summary TEXT;'))
-                
-                # Transaction is committed automatically at the end of the 'with' block
+                for indexed_table in (table_name, 'user', 'reward', 'waste_journey_block'):
+                    create_indexes_if_missing(conn, indexed_table)
+
+            # Count existing reports into the map clusters once
+            if not db.session.query(InfrastructureCluster.query.exists()).scalar():
+                rebuild_clusters()
+            
+            # Store the Merkle trees of checkpoints taken before trees were stored
+            backfilled_trees = backfill_checkpoint_trees()
+            if backfilled_trees:
+                logging.info(f"Stored Merkle trees for {backfilled_trees} journey checkpoint(s).")
             
-            logging.info("Database schema update completed successfully.")
+            # Fill in the journey chain heads of existing items
+            backfilled = check_chain_heads(fix=True)
+            if backfilled:
+                logging.info(f"Backfilled journey chain heads for {len(backfilled)} item(s).")
+
+            logging.info("✅ Database schema update completed successfully.")
         except Exception as e:
-            logging.error(f"Error updating database schema: {str(e)}")
-            # We don't raise the exception here as we want the deployment to continue
-            # even if there was an issue with the schema update
+            logging.error(f"❌ Error updating database schema: {str(e)}")
 
 if __name__ == '__main__':
     update_waste_item_table()
->>>>>>> 29a39b63817c010f5cf573453f1150bf94574afe
@@ -0,0 +1,122 @@
+"""
+Per-worker cache of logged-in users for WasteWorks.
+Flask-Login loads the session user on every request. Caching the fields
+templates need saves that database round trip; the full User row is only
+loaded when code touches anything else.
+"""
+
+import threading
+import time
+from flask_login import UserMixin
+from app import app, db
+from models import User
+
+# Fields kept in the cache and served without touching the database
+HOT_FIELDS = ('id', 'username', 'email', 'full_name', 'join_date',
+              'is_active', 'eco_points', 'recycling_streak')
+
+# Entries expire after this long, which also bounds how stale a change
+# made by another gunicorn worker can appear in this one
+CACHE_TTL_SECONDS = app.config.get("USER_CACHE_TTL_SECONDS", 60)
+CACHE_MAX_ENTRIES = 10000
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+class CachedUser(UserMixin):
+    """
+    Stand-in for the session user built from cached hot fields.
+    Reading any other attribute, or writing any attribute, loads the real
+    User row and forwards to it for the rest of the request.
+    """
+
+    def __init__(self, fields, user=None):
+        object.__setattr__(self, '_fields', fields)
+        object.__setattr__(self, '_user', user)
+
+    def _get_user(self):
+        if self._user is None:
+            object.__setattr__(self, '_user', db.session.get(User, self._fields['id']))
+        return self._user
+
+    @property
+    def is_active(self):
+        if self._user is not None:
+            return self._user.is_active
+        return self._fields['is_active'] is not False
+
+    def get_id(self):
+        return str(self._fields['id'])
+
+    def __getattr__(self, name):
+        # Only called for attributes not found on the class
+        if self._user is None and name in self._fields:
+            return self._fields[name]
+        return getattr(self._get_user(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get_user(), name, value)
+        invalidate_user(self._fields['id'])
+
+    def __eq__(self, other):
+        if isinstance(other, (CachedUser, User)):
+            return self.id == other.id
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._fields['id'])
+
+    def __repr__(self):
+        return f"<CachedUser {self._fields['username']}>"
+
+def load_cached_user(user_id):
+    """
+    Load the session user, from the cache when possible.
+
+    Args:
+        user_id: ID of the user stored in the session
+
+    Returns:
+        CachedUser, or None if the user no longer exists
+    """
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(user_id)
+    if entry and entry[0] > now:
+        return CachedUser(entry[1])
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        invalidate_user(user_id)
+        return None
+
+    fields = {field: getattr(user, field) for field in HOT_FIELDS}
+    with _cache_lock:
+        if len(_cache) >= CACHE_MAX_ENTRIES:
+            _evict_expired(now)
+        _cache[user_id] = (now + CACHE_TTL_SECONDS, fields)
+
+    return CachedUser(fields, user)
+
+def invalidate_user(user_id):
+    """
+    Drop a user from the cache so the next request reloads them.
+
+    Args:
+        user_id: ID of the user
+    """
+    with _cache_lock:
+        _cache.pop(user_id, None)
+
+def _evict_expired(now):
+    """Remove expired entries, or everything if none have expired yet"""
+    expired = [user_id for user_id, (expires_at, _) in _cache.items() if expires_at <= now]
+    if not expired:
+        _cache.clear()
+    for user_id in expired:
+        del _cache[user_id]
+
+@db.event.listens_for(User, "after_update")
+def _invalidate_updated_user(mapper, connection, target):
+    # Profile, password and streak changes made through the ORM
+    invalidate_user(target.id)